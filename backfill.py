@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import csv
+import heapq
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from asyncua import Client, Node, ua
+
+import metrics
+from inference_client import AsyncInferenceClient
+from mlserver_grpc import create_inference_clients, load_config, to_opcua_value
+from model_bindings import ModelBinding, get_model_bindings, resolve_bindings
+from node_resolver import NodeResolver
+
+
+async def history_samples(
+    node: Node, start: datetime, end: datetime, chunk_size: int
+) -> AsyncIterator[Tuple[datetime, object]]:
+    """Yield ``(timestamp, value)`` of a node's history, reading ``chunk_size`` at a time.
+
+    Pages follow the server's continuation points. A server may instead cut
+    a full page without one (asyncua does), then the next page starts again
+    at the last timestamp and skips the values of it already yielded, so
+    values sharing a timestamp across a page boundary are neither lost nor
+    repeated.
+    """
+    details = ua.ReadRawModifiedDetails(
+        IsReadModified=False,
+        StartTime=start,
+        EndTime=end,
+        NumValuesPerNode=chunk_size,
+        ReturnBounds=False,
+    )
+    continuation_point = None
+    skip = 0
+    while True:
+        with metrics.span("history"):
+            result = await node.history_read(details, continuation_point)
+        result.StatusCode.check()
+        data_values = result.HistoryData.DataValues if result.HistoryData else []
+        for data_value in data_values[skip:]:
+            yield data_value.SourceTimestamp, data_value.Value.Value
+        if result.ContinuationPoint:
+            continuation_point, skip = result.ContinuationPoint, 0
+            continue
+        if len(data_values) < chunk_size:
+            return
+        last = data_values[-1].SourceTimestamp
+        skip = sum(1 for data_value in data_values if data_value.SourceTimestamp == last)
+        if skip == chunk_size:
+            # Starting at the same timestamp again would return the same page.
+            logging.warning(
+                f"{chunk_size} or more history values of {node} at {last}, "
+                "skipping the rest of them, raise the chunk size to read them"
+            )
+            last, skip = last + timedelta(microseconds=1), 0
+        continuation_point = None
+        details.StartTime = last
+
+
+async def aligned_rows(
+    streams: Dict[str, AsyncIterator[Tuple[datetime, object]]],
+) -> AsyncIterator[Tuple[datetime, Dict]]:
+    """Merge per-tag histories into rows holding the latest value of every tag.
+
+    A row is emitted for each distinct timestamp once every tag has a value,
+    tags that did not change at that timestamp keep their previous value.
+    """
+    heap = []
+    for order, (name, stream) in enumerate(streams.items()):
+        async for timestamp, value in stream:
+            heapq.heappush(heap, (timestamp, order, name, value))
+            break
+    order_of = {name: order for order, name in enumerate(streams)}
+    values: Dict = {}
+    while heap:
+        timestamp, _, name, value = heapq.heappop(heap)
+        values[name] = value
+        async for next_timestamp, next_value in streams[name]:
+            heapq.heappush(heap, (next_timestamp, order_of[name], name, next_value))
+            break
+        if len(values) == len(streams) and (not heap or heap[0][0] != timestamp):
+            yield timestamp, dict(values)
+
+
+async def infer_batch(
+    inference_client: AsyncInferenceClient,
+    model_name: str,
+    rows: List[Dict],
+    model_version: str = "",
+) -> List[Dict]:
+    """Predict all ``rows`` with one ModelInfer using a leading batch dimension."""
+    codec = await inference_client.codec(model_name, model_version)
+    with metrics.span("encode", model_name):
+        request = codec.encode_batch(rows)
+    with metrics.span("infer", model_name):
+        response = await inference_client.model_infer(request)
+    with metrics.span("decode", model_name):
+        return codec.decode_batch(response, len(rows))
+
+
+class CsvSink:
+    """Writes one row per prediction: timestamp, object and every output."""
+
+    def __init__(self, path: str, output_names: List[str]):
+        self.output_names = output_names
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["timestamp", "object", *output_names])
+
+    async def write(self, binding: ModelBinding, timestamps: List[datetime], outputs: List[Dict]):
+        for timestamp, output_values in zip(timestamps, outputs):
+            self._writer.writerow(
+                [
+                    timestamp.isoformat(),
+                    binding.name,
+                    *(
+                        json.dumps(to_opcua_value(output_values[name]))
+                        if name in output_values
+                        else ""
+                        for name in self.output_names
+                    ),
+                ]
+            )
+
+    async def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Writes each batch as a row group of a Parquet file (needs pyarrow)."""
+
+    def __init__(self, path: str, output_names: List[str]):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Writing Parquet files requires pyarrow: pip install pyarrow") from e
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.path = path
+        self.output_names = output_names
+        self._writer = None
+
+    async def write(self, binding: ModelBinding, timestamps: List[datetime], outputs: List[Dict]):
+        columns = {"timestamp": timestamps, "object": [binding.name] * len(timestamps)}
+        for name in self.output_names:
+            columns[name] = [to_opcua_value(output.get(name)) for output in outputs]
+        if self._writer is None:
+            table = self._pyarrow.Table.from_pydict(columns)
+            self._writer = self._parquet.ParquetWriter(self.path, table.schema)
+        else:
+            table = self._pyarrow.Table.from_pydict(columns, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class HistorySink:
+    """Writes the outputs back to their tags with the inputs' source timestamps.
+
+    A historizing server stores them as the output history of that time range.
+    """
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def write(self, binding: ModelBinding, timestamps: List[datetime], outputs: List[Dict]):
+        nodes, data_values = [], []
+        for timestamp, output_values in zip(timestamps, outputs):
+            for name, node in binding.output_objs.items():
+                nodes.append(node)
+                data_values.append(
+                    ua.DataValue(
+                        ua.Variant(to_opcua_value(output_values[name])),
+                        SourceTimestamp=timestamp,
+                    )
+                )
+        with metrics.span("write", binding.model_name):
+            await self.client.write_values(nodes, data_values)
+
+    async def close(self):
+        pass
+
+
+async def backfill_binding(
+    inference_client: AsyncInferenceClient,
+    binding: ModelBinding,
+    start: datetime,
+    end: datetime,
+    sinks: List,
+    chunk_size: int = 10000,
+    batch_size: int = 1024,
+) -> int:
+    """Predict over the history of one binding's inputs, return the number of rows.
+
+    At most ``chunk_size`` samples per input tag and ``batch_size`` rows are
+    held in memory, whatever the length of the time range.
+    """
+    streams = {
+        name: history_samples(node, start, end, chunk_size)
+        for name, node in binding.input_objs.items()
+    }
+    count = 0
+    timestamps: List[datetime] = []
+    rows: List[Dict] = []
+
+    async def flush():
+        outputs = await infer_batch(
+            inference_client, binding.model_name, rows, binding.model_version
+        )
+        for sink in sinks:
+            await sink.write(binding, timestamps, outputs)
+        metrics.PREDICTIONS.inc(binding.model_name, amount=len(rows))
+
+    async for timestamp, input_values in aligned_rows(streams):
+        timestamps.append(timestamp)
+        rows.append(input_values)
+        if len(rows) == batch_size:
+            await flush()
+            count += len(rows)
+            logging.info(f"Backfilled {count} rows of '{binding.name}' up to {timestamp}")
+            timestamps, rows = [], []
+    if rows:
+        await flush()
+        count += len(rows)
+    return count
+
+
+def open_sink(path: str, output_names: List[str]):
+    if path.endswith(".parquet"):
+        return ParquetSink(path, output_names)
+    return CsvSink(path, output_names)
+
+
+async def run_backfill(
+    config: Dict,
+    start: datetime,
+    end: datetime,
+    output: Optional[str] = None,
+    write_history: bool = False,
+    chunk_size: int = 10000,
+    batch_size: int = 1024,
+):
+    bindings = get_model_bindings(config)
+    metrics_server = metrics.configure(config.get("metrics"))
+    async with Client(url=config["opcua_server_url"]) as client:
+        resolver = NodeResolver(
+            client, config["opcua_namespace"], config.get("nodeid_cache_file")
+        )
+        await resolve_bindings(resolver, bindings)
+        inference_clients = create_inference_clients(bindings, config.get("load_balancing"))
+
+        sinks = []
+        if output:
+            output_names = []
+            for binding in bindings:
+                output_names += [name for name in binding.output_objs if name not in output_names]
+            sinks.append(open_sink(output, output_names))
+        if write_history:
+            sinks.append(HistorySink(client))
+        try:
+            for binding in bindings:
+                count = await backfill_binding(
+                    inference_clients[binding.mlserver_grpc_url],
+                    binding,
+                    start,
+                    end,
+                    sinks,
+                    chunk_size=chunk_size,
+                    batch_size=batch_size,
+                )
+                logging.info(f"Backfilled {count} rows of '{binding.name}'")
+        finally:
+            for sink in sinks:
+                await sink.close()
+            for inference_client in inference_clients.values():
+                await inference_client.close()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+
+
+def parse_time(value: str) -> datetime:
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the bound models over the OPC UA history of their input tags"
+    )
+    parser.add_argument("--start", type=parse_time, required=True, help="ISO time, UTC if no offset")
+    parser.add_argument("--end", type=parse_time, help="ISO time, default now")
+    parser.add_argument("--output", help="Write predictions to this .csv or .parquet file")
+    parser.add_argument(
+        "--write-history", action="store_true", help="Write predictions back to the output tags"
+    )
+    parser.add_argument("--chunk-size", type=int, default=10000, help="History values per read")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Rows per ModelInfer")
+    args = parser.parse_args()
+    if not args.output and not args.write_history:
+        parser.error("Nothing to do, give --output and/or --write-history")
+
+    asyncio.run(
+        run_backfill(
+            load_config(),
+            args.start,
+            args.end or datetime.now(timezone.utc),
+            output=args.output,
+            write_history=args.write_history,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+        )
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+import metrics
+from model_bindings import ModelBinding
+
+POLICIES = ("coalesce", "drop_oldest", "reject")
+
+
+class PredictionQueue:
+    """Bounded queue of predictions between the triggers and one MLServer endpoint.
+
+    At most ``max_size`` predictions wait and ``max_in_flight`` run at once,
+    at most ``pipeline_depth`` of the same binding. Predictions of a binding
+    overlap (the next one reads and infers while the previous one writes),
+    but each waits for the previous one's write before its own, so an
+    object's outputs are always written in trigger order. When a trigger
+    arrives ``policy`` decides what happens:
+
+    - ``coalesce``: a binding with a waiting prediction gets its inputs
+      replaced by the newer ones, otherwise the oldest waiting one is dropped
+      when the queue is full,
+    - ``drop_oldest``: the oldest waiting prediction is dropped when full,
+    - ``reject``: the new trigger is dropped when full.
+
+    ``on_drop`` is called with the binding of every dropped prediction.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[
+            [ModelBinding, Optional[Dict], Optional[asyncio.Event]], Awaitable[None]
+        ],
+        max_size: int = 1000,
+        policy: str = "coalesce",
+        max_in_flight: int = 16,
+        on_drop: Optional[Callable[[ModelBinding], None]] = None,
+        pipeline_depth: int = 1,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} !")
+        self.predict = predict
+        self.max_size = max_size
+        self.policy = policy
+        self.max_in_flight = max_in_flight
+        self.on_drop = on_drop
+        self.pipeline_depth = pipeline_depth
+        self.dropped: Dict[ModelBinding, int] = {}
+        self._jobs: Deque[List] = deque()
+        self._waiting: Dict[ModelBinding, int] = {}
+        self._in_flight: Dict[ModelBinding, int] = {}
+        # Set once the latest started prediction of a binding has written.
+        self._written: Dict[ModelBinding, asyncio.Event] = {}
+        self._ready = asyncio.Event()
+
+    def depth(self, binding: ModelBinding) -> int:
+        return self._waiting.get(binding, 0)
+
+    def submit(self, binding: ModelBinding, input_values: Optional[Dict] = None) -> bool:
+        """Queue a prediction, return False if it was rejected."""
+        if self.policy == "coalesce" and self._waiting.get(binding):
+            for job in self._jobs:
+                if job[0] is binding:
+                    job[1] = input_values
+                    metrics.SUPPRESSED_TRIGGERS.inc(binding.model_name, "coalesced")
+                    return True
+        if len(self._jobs) >= self.max_size:
+            if self.policy == "reject":
+                self._drop(binding, "rejected")
+                return False
+            oldest, _ = self._jobs.popleft()
+            self._waiting[oldest] -= 1
+            self._drop(oldest, "dropped")
+        self._jobs.append([binding, input_values])
+        self._waiting[binding] = self._waiting.get(binding, 0) + 1
+        self._ready.set()
+        return True
+
+    async def run(self):
+        await asyncio.gather(*(self._worker() for _ in range(self.max_in_flight)))
+
+    def _drop(self, binding: ModelBinding, reason: str):
+        self.dropped[binding] = self.dropped.get(binding, 0) + 1
+        metrics.SUPPRESSED_TRIGGERS.inc(binding.model_name, reason)
+        logging.warning(f"Prediction for '{binding.name}' {reason}, the queue is full")
+        if self.on_drop is not None:
+            self.on_drop(binding)
+
+    def _take(self) -> Optional[List]:
+        for job in self._jobs:
+            if self._in_flight.get(job[0], 0) < self.pipeline_depth:
+                self._jobs.remove(job)
+                self._waiting[job[0]] -= 1
+                return job
+        return None
+
+    async def _worker(self):
+        while True:
+            job = self._take()
+            if job is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            binding, input_values = job
+            previous = self._written.get(binding)
+            written = self._written[binding] = asyncio.Event()
+            self._in_flight[binding] = self._in_flight.get(binding, 0) + 1
+            try:
+                await self.predict(binding, input_values, previous)
+            except Exception:
+                # One failing prediction must not stop the worker.
+                logging.exception(f"Prediction for '{binding.name}' failed")
+            finally:
+                # Also on failure, the next prediction must not wait forever.
+                written.set()
+                self._in_flight[binding] -= 1
+                if self._written.get(binding) is written:
+                    del self._written[binding]
+                # Waiting predictions of this binding can run now.
+                self._ready.set()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+import metrics
+from inference_client import AsyncInferenceClient
+
+
+class MicroBatcher:
+    """Coalesces concurrent predictions for the same model into one ModelInfer.
+
+    Requests are collected for up to ``window`` seconds after the first one
+    arrives, or until ``max_batch_size`` are pending, then sent as a single
+    request with a leading batch dimension. Has the same ``infer`` signature
+    as AsyncInferenceClient so the bridge can use either. Models with a
+    result cache on the client are not batched, their hits skip the batch.
+    """
+
+    def __init__(
+        self,
+        inference_client: AsyncInferenceClient,
+        window: float = 0.005,
+        max_batch_size: int = 32,
+    ):
+        self.inference_client = inference_client
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Tuple[str, str], List[Tuple[Dict, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._batches = set()
+
+    async def infer(
+        self, model_name: str, input_values: Dict, model_version: str = ""
+    ) -> Dict:
+        if model_name in self.inference_client.result_caches:
+            return await self.inference_client.infer(
+                model_name, input_values, model_version
+            )
+        key = (model_name, model_version)
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((input_values, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif len(pending) == 1:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key
+            )
+        # Counted from now, the request is sent when the window closes.
+        with self.inference_client.track(model_name, model_version):
+            return await future
+
+    def _flush(self, key: Tuple[str, str]):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(key, batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(
+        self, key: Tuple[str, str], batch: List[Tuple[Dict, asyncio.Future]]
+    ):
+        model_name, model_version = key
+        try:
+            codec = await self.inference_client.codec(model_name, model_version)
+            with metrics.span("encode", model_name):
+                model_inference_req = codec.encode_batch(
+                    [input_values for input_values, _ in batch]
+                )
+            logging.debug(f"Sending batch of {len(batch)} requests to {model_name}")
+            with metrics.span("infer", model_name):
+                model_inference_res = await self.inference_client.model_infer(
+                    model_inference_req
+                )
+            with metrics.span("decode", model_name):
+                batch_outputs = codec.decode_batch(model_inference_res, len(batch))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), output_values in zip(batch, batch_outputs):
+            if not future.done():
+                future.set_result(output_values)
@@ -0,0 +1,853 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import grpc
+import numpy as np
+import yaml
+from asyncua import Client
+
+import dataplane_pb2
+import dataplane_pb2_grpc
+from batching import MicroBatcher
+from fake_mlserver import FakeMLServer, start_fake_mlserver, sum_model
+from inference_client import AsyncInferenceClient, InferenceClient
+from model_bindings import ModelBinding
+from node_resolver import NodeResolver
+from rollout import Shadow, switch_model
+from tensors import TensorCodec, generate_infer_inputs, parse_output_values
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(latencies: List[float]) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def time_calls(fn: Callable[[], object], iterations: int) -> List[float]:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def cold_call(mlserver_grpc_url: str, model_name: str, input_values: Dict) -> Dict:
+    # What every prediction used to pay: new channel, new stub, metadata RPC.
+    with grpc.insecure_channel(target=mlserver_grpc_url) as channel:
+        stub = dataplane_pb2_grpc.GRPCInferenceServiceStub(channel=channel)
+        model_metadata = stub.ModelMetadata(
+            dataplane_pb2.ModelMetadataRequest(name=model_name)
+        )
+        model_inference_res = stub.ModelInfer(
+            dataplane_pb2.ModelInferRequest(
+                model_name=model_name,
+                inputs=generate_infer_inputs(
+                    inputs_metadata=model_metadata.inputs, inputs_values=input_values
+                ),
+            )
+        )
+        return parse_output_values(model_inference_res.outputs)
+
+
+def bench_client(args) -> Dict:
+    servicer = FakeMLServer(delay=args.delay)
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    input_values = {"a": 1, "b": 2}
+    try:
+        cold = time_calls(
+            lambda: cold_call(mlserver_grpc_url, servicer.model_name, input_values),
+            args.iterations,
+        )
+        with InferenceClient(mlserver_grpc_url, pool_size=args.pool_size) as client:
+            client.infer(servicer.model_name, input_values)
+            warm = time_calls(
+                lambda: client.infer(servicer.model_name, input_values),
+                args.iterations,
+            )
+    finally:
+        server.stop(grace=None)
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+async def drive_concurrent(predictor, model_name: str, concurrency: int, duration: float):
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def caller(i: int):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await predictor.infer(model_name, {"a": i, "b": 1})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return dict(summarize(latencies), predictions_per_sec=len(latencies) / elapsed)
+
+
+def bench_batching(args) -> Dict:
+    servicer = FakeMLServer(delay=args.delay)
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+
+    async def run():
+        results = {}
+        async with AsyncInferenceClient(mlserver_grpc_url) as client:
+            await client.model_metadata(servicer.model_name)
+            results["unbatched"] = await drive_concurrent(
+                client, servicer.model_name, args.concurrency, args.duration
+            )
+            for window_ms in args.windows:
+                servicer.infer_count = 0
+                batcher = MicroBatcher(
+                    client, window=window_ms / 1000, max_batch_size=args.max_batch_size
+                )
+                result = await drive_concurrent(
+                    batcher, servicer.model_name, args.concurrency, args.duration
+                )
+                result["model_infer_calls"] = servicer.infer_count
+                results[f"window_{window_ms}ms"] = result
+        return results
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.stop(grace=None)
+
+
+class SpikyMLServer(FakeMLServer):
+    """FakeMLServer whose ModelInfer takes ``tail_delay`` longer in ``tail_fraction`` of calls."""
+
+    def __init__(self, tail_fraction: float = 0.0, tail_delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.tail_fraction = tail_fraction
+        self.tail_delay = tail_delay
+
+    def ModelInfer(self, request, context):
+        if random.random() < self.tail_fraction:
+            time.sleep(self.tail_delay)
+        return super().ModelInfer(request, context)
+
+
+def bench_balancing(args) -> Dict:
+    """One endpoint vs least-outstanding routing, hedging and failover over several."""
+    servicers = [
+        SpikyMLServer(delay=delay, tail_fraction=args.tail_fraction, tail_delay=args.tail_delay)
+        for delay in args.endpoint_delays
+    ]
+    servers, urls = zip(
+        *(
+            start_fake_mlserver(servicer, max_workers=args.endpoint_workers)
+            for servicer in servicers
+        )
+    )
+    model_name = servicers[0].model_name
+    # A second model only the last endpoint has loaded: the other endpoints
+    # answer its health checks with NOT_FOUND and must keep serving model_name.
+    servicers[-1].models["candidate"] = sum_model
+    scenarios = {
+        "single": (urls[0], None),
+        "least_outstanding": (",".join(urls), None),
+        "hedged": (",".join(urls), args.hedge_after_ms / 1000),
+        # The first endpoint is stopped halfway through.
+        "failover": (",".join(urls), None),
+    }
+
+    async def run():
+        results = {}
+        for scenario, (mlserver_grpc_url, hedge_after) in scenarios.items():
+            for servicer in servicers:
+                servicer.infer_count = 0
+            async with AsyncInferenceClient(
+                mlserver_grpc_url, health_interval=0.5, hedge_after=hedge_after
+            ) as client:
+                await client.model_metadata(model_name)
+                if scenario != "single":
+                    await client.wait_until_ready("candidate", interval=0.1)
+                if scenario == "failover":
+                    loop = asyncio.get_running_loop()
+                    loop.call_later(args.duration / 2, servers[0].stop, None)
+                results[scenario] = await drive_concurrent(
+                    client, model_name, args.concurrency, args.duration
+                )
+            results[scenario]["model_infer_calls"] = {
+                url: servicer.infer_count for url, servicer in zip(urls, servicers)
+            }
+        return results
+
+    try:
+        return asyncio.run(run())
+    finally:
+        for server in servers:
+            server.stop(grace=None)
+
+
+def candidate_model(input_values: Dict) -> Dict:
+    # Differs from sum_model on every tenth row, for the shadow comparison.
+    outputs = sum_model(input_values)
+    outputs["sum"] = [value + (value % 10 == 0) for value in outputs["sum"]]
+    return outputs
+
+
+def bench_rollout(args) -> Dict:
+    """Shadow a candidate model, then switch to it under load."""
+    servicer = FakeMLServer(delay=args.delay, repository={"candidate": candidate_model})
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    binding = ModelBinding(
+        servicer.model_name, mlserver_grpc_url, {"inputs": [], "outputs": []}
+    )
+
+    async def drive(client: AsyncInferenceClient, shadow: Optional[Shadow], duration: float):
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def caller(i: int):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                input_values = {"a": i, "b": len(latencies)}
+                start = time.perf_counter()
+                try:
+                    output_values = await client.infer(
+                        binding.model_name, input_values, binding.model_version
+                    )
+                except grpc.aio.AioRpcError:
+                    errors += 1
+                    continue
+                latency = time.perf_counter() - start
+                latencies.append(latency)
+                if shadow is not None:
+                    shadow.mirror(binding, input_values, output_values, latency)
+
+        await asyncio.gather(*(caller(i) for i in range(args.concurrency)))
+        return dict(summarize(latencies), errors=errors)
+
+    async def run():
+        results = {}
+        async with AsyncInferenceClient(mlserver_grpc_url) as client:
+            await client.load_model("candidate")
+            shadow = Shadow(client, "candidate", fraction=args.shadow_fraction)
+            results["shadow"] = await drive(client, shadow, args.duration)
+            results["shadow"].update(compared=shadow.compared, mismatches=shadow.mismatches)
+            await client.unload_model("candidate")
+
+            results["before_switch"] = await drive(client, None, args.duration)
+            # The switch loads, warms, flips and unloads while the load continues.
+            driving = asyncio.ensure_future(drive(client, None, args.duration))
+            await asyncio.sleep(args.duration / 4)
+            started = time.perf_counter()
+            await switch_model(client, binding, [binding], "candidate")
+            switch_seconds = time.perf_counter() - started
+            results["during_switch"] = await driving
+            results["during_switch"]["switch_seconds"] = switch_seconds
+            results["loaded_models"] = sorted(servicer.models)
+        return results
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.stop(grace=None)
+
+
+def encode_decode(codec: TensorCodec, input_values: Dict):
+    # Request encode + wire round trip, then decode the same tensors as outputs.
+    request = codec.encode(input_values)
+    request = dataplane_pb2.ModelInferRequest.FromString(request.SerializeToString())
+    response = dataplane_pb2.ModelInferResponse(
+        outputs=[
+            dataplane_pb2.ModelInferResponse.InferOutputTensor(
+                name=input.name,
+                datatype=input.datatype,
+                shape=input.shape,
+                contents=input.contents,
+            )
+            for input in request.inputs
+        ],
+        raw_output_contents=request.raw_input_contents,
+    )
+    response = dataplane_pb2.ModelInferResponse.FromString(response.SerializeToString())
+    return codec.decode(response)
+
+
+def bench_encoding(args) -> Dict:
+    results = {}
+    for size in args.sizes:
+        model_metadata = dataplane_pb2.ModelMetadataResponse(
+            inputs=[
+                dataplane_pb2.ModelMetadataResponse.TensorMetadata(
+                    name="x", datatype="FP32", shape=[-1]
+                )
+            ]
+        )
+        values = np.random.default_rng(0).random(size, dtype=np.float32)
+        iterations = max(3, min(args.iterations, 10_000_000 // (size * 10)))
+        for encoding, input_values, raw_encoding in [
+            ("contents", {"x": values.tolist()}, False),
+            ("raw", {"x": values}, True),
+        ]:
+            codec = TensorCodec(model_metadata, "bench", raw_encoding=raw_encoding)
+            latencies = time_calls(
+                lambda: encode_decode(codec, input_values), iterations
+            )
+            results[f"{encoding}_{size}"] = summarize(latencies)
+    return results
+
+
+def length_model(input_values: Dict) -> Dict:
+    return {"sum": [float(len(column)) for column in input_values.values()][:1]}
+
+
+class SaturatingDriver:
+    """Sets `predict` again as soon as a bridge resets it, counting the resets."""
+
+    def __init__(self):
+        self.running = False
+        self.completions = 0
+        self._writes = set()
+
+    def datachange_notification(self, node, val, data):
+        if val or not self.running:
+            return
+        self.completions += 1
+        write = asyncio.ensure_future(node.write_value(True))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+
+async def drive_workers(args, config: Dict) -> Dict:
+    """Keep every object's `predict` set for ``--duration`` and count the predictions."""
+    await all_predictions_done(config, args.objects, timeout=60)
+    client = await connect(config["opcua_server_url"])
+    try:
+        resolver = NodeResolver(client, config["opcua_namespace"])
+        nsidx = await resolver.get_namespace_index()
+        predict_nodes = await resolver.resolve(
+            [
+                ["0:Objects", f"{nsidx}:Bench", f"{nsidx}:Machine{i}", f"{nsidx}:predict"]
+                for i in range(args.objects)
+            ]
+        )
+        driver = SaturatingDriver()
+        subscription = await client.create_subscription(10, driver)
+        await subscription.subscribe_data_change(predict_nodes, sampling_interval=0)
+        await asyncio.sleep(0.5)
+        driver.running = True
+        start = time.perf_counter()
+        await client.write_values(predict_nodes, [True] * len(predict_nodes))
+        await asyncio.sleep(args.duration)
+        driver.running = False
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.disconnect()
+    return {
+        "predictions": driver.completions,
+        "predictions_per_sec": driver.completions / elapsed,
+    }
+
+
+def bench_workers(args) -> Dict:
+    """Predictions/sec of `python workers.py` for each worker count.
+
+    Each input is a window of ``--array-size`` samples, so encoding makes the
+    bridge CPU-bound; the bindings of ``--objects`` machines are sharded
+    across the workers.
+    """
+    servicer = FakeMLServer(
+        input_specs=[
+            {"name": "a", "datatype": "FP64", "shape": [-1]},
+            {"name": "b", "datatype": "FP64", "shape": [-1]},
+        ],
+        output_specs=[{"name": "sum", "datatype": "FP64", "shape": [1]}],
+        model_fn=length_model,
+    )
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    results = {"cpu_count": multiprocessing.cpu_count()}
+    with tempfile.TemporaryDirectory() as workdir:
+        config = e2e_config(args, mlserver_grpc_url)
+        for input in config["tag_mapping"]["inputs"]:
+            input["window"] = args.array_size
+        processes = []
+
+        def start(script: str) -> subprocess.Popen:
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(REPO_DIR, script)],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            processes.append(process)
+            return process
+
+        try:
+            for workers in args.worker_counts:
+                config["workers"] = workers
+                with open(os.path.join(workdir, "opcua_config.yml"), "w") as file:
+                    yaml.safe_dump(config, file)
+                # A fresh server sets predict on every object, so the drive
+                # starts once all workers serve.
+                started = [start("server.py"), start("workers.py")]
+                results[f"workers_{workers}"] = asyncio.run(drive_workers(args, config))
+                for process in reversed(started):
+                    process.terminate()
+                    process.wait()
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.terminate()
+                    process.wait()
+            server.stop(grace=None)
+    return results
+
+
+def process_usage(pid: int) -> Dict:
+    """CPU seconds and resident memory of a process, read from /proc."""
+    with open(f"/proc/{pid}/stat", "r") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/status", "r") as file:
+        rss_kb = next(
+            int(line.split()[1]) for line in file if line.startswith("VmRSS:")
+        )
+    return {
+        "cpu_s": (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"),
+        "rss_mb": rss_kb / 1024,
+    }
+
+
+def e2e_config(args, mlserver_grpc_url: str) -> Dict:
+    return {
+        "opcua_namespace": "http://factoryml.alexandra.dk",
+        "opcua_server_url": f"opc.tcp://localhost:{args.opcua_port}/factoryml/server/",
+        "mlserver_grpc_url": mlserver_grpc_url,
+        "trigger": {"mode": "subscription", "publishing_interval": 10},
+        "tag_mapping": {
+            "inputs": [
+                {"name": "a", "tag": "weight_of_platform"},
+                {"name": "b", "tag": "weight_of_load"},
+            ],
+            "outputs": [{"name": "sum", "tag": "total_weight"}],
+        },
+        "models": [
+            {"model_name": "pyfunc", "object_path": f"Bench/Machine{i}"}
+            for i in range(args.objects)
+        ],
+        "server": {"change_log_rate": 0},
+    }
+
+
+class CompletionHandler:
+    """Records trigger-to-output latency when a bridge resets `predict`."""
+
+    def __init__(self):
+        self.pending: Dict = {}
+        self.latencies: List[float] = []
+
+    def datachange_notification(self, node, val, data):
+        if not val and node in self.pending:
+            self.latencies.append(time.perf_counter() - self.pending.pop(node))
+
+
+async def wait_for(predicate: Callable[[], bool], timeout: float):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Timed out waiting for the bridge")
+        await asyncio.sleep(0.05)
+
+
+async def connect(opcua_server_url: str, timeout: float = 30.0) -> Client:
+    deadline = time.perf_counter() + timeout
+    while True:
+        client = Client(url=opcua_server_url)
+        try:
+            await client.connect()
+            return client
+        except (OSError, asyncio.TimeoutError):
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def drive_e2e(
+    args, config: Dict, pids: Dict[str, int], start_bridge: Callable[[], int]
+) -> Dict:
+    client = await connect(config["opcua_server_url"])
+    try:
+        # The bridge exits when the server is not up yet, so start it now.
+        pids["bridge"] = start_bridge()
+        resolver = NodeResolver(client, config["opcua_namespace"])
+        nsidx = await resolver.get_namespace_index()
+        predict_nodes = await resolver.resolve(
+            [
+                ["0:Objects", f"{nsidx}:Bench", f"{nsidx}:Machine{i}", f"{nsidx}:predict"]
+                for i in range(args.objects)
+            ]
+        )
+        handler = CompletionHandler()
+        subscription = await client.create_subscription(10, handler)
+        await subscription.subscribe_data_change(predict_nodes, sampling_interval=0)
+
+        # The bridge handles the initial predict=True of every object first.
+        async def all_reset():
+            return not any(await client.read_values(predict_nodes))
+
+        deadline = time.perf_counter() + 60
+        while not await all_reset():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Timed out waiting for the bridge")
+            await asyncio.sleep(0.1)
+
+        for node in predict_nodes:
+            handler.pending[node] = time.perf_counter()
+        await client.write_values(predict_nodes, [True] * len(predict_nodes))
+        await wait_for(lambda: not handler.pending, timeout=30)
+        handler.latencies.clear()
+
+        usage_before = {name: process_usage(pid) for name, pid in pids.items()}
+        usage_start = time.perf_counter()
+        writes = set()
+        triggered = skipped = 0
+        interval = 1.0 / args.rate
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration:
+            node = predict_nodes[triggered % len(predict_nodes)]
+            if node in handler.pending:
+                skipped += 1
+            else:
+                handler.pending[node] = time.perf_counter()
+                write = asyncio.ensure_future(node.write_value(True))
+                writes.add(write)
+                write.add_done_callback(writes.discard)
+            triggered += 1
+            await asyncio.sleep(max(0.0, start + triggered * interval - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(min(5.0, 1.0 + args.delay * 10))
+        usage_after = {name: process_usage(pid) for name, pid in pids.items()}
+        usage_elapsed = time.perf_counter() - usage_start
+    finally:
+        await client.disconnect()
+
+    return {
+        "target_rate": args.rate,
+        "triggered": triggered,
+        "skipped_busy": skipped,
+        "unfinished": len(handler.pending),
+        "predictions_per_sec": len(handler.latencies) / elapsed,
+        "latency": summarize(handler.latencies) if handler.latencies else {},
+        "components": {
+            name: {
+                "cpu_percent": 100
+                * (usage_after[name]["cpu_s"] - usage_before[name]["cpu_s"])
+                / usage_elapsed,
+                "rss_mb": usage_after[name]["rss_mb"],
+            }
+            for name in pids
+        },
+    }
+
+
+def bench_e2e(args) -> Dict:
+    """client -> server.py -> mlserver_grpc.py -> fake MLServer, end to end."""
+    servicer = FakeMLServer(delay=args.delay)
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    processes = []
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "opcua_config.yml"), "w") as file:
+            config = e2e_config(args, mlserver_grpc_url)
+            yaml.safe_dump(config, file)
+
+        def start(script: str) -> int:
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(REPO_DIR, script)],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            processes.append(process)
+            return process.pid
+
+        try:
+            pids = {"server": start("server.py"), "driver_and_mlserver": os.getpid()}
+            return asyncio.run(
+                drive_e2e(args, config, pids, lambda: start("mlserver_grpc.py"))
+            )
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+            server.stop(grace=None)
+
+
+async def all_predictions_done(
+    config: Dict, objects: int, timeout: float
+) -> Tuple[float, float]:
+    """Wait until the bridge has reset the initial predict of every object.
+
+    Returns when the server accepted the connection and when all were reset.
+    """
+    client = await connect(config["opcua_server_url"], timeout)
+    connected = time.perf_counter()
+    try:
+        resolver = NodeResolver(client, config["opcua_namespace"])
+        nsidx = await resolver.get_namespace_index()
+        predict_nodes = await resolver.resolve(
+            [
+                ["0:Objects", f"{nsidx}:Bench", f"{nsidx}:Machine{i}", f"{nsidx}:predict"]
+                for i in range(objects)
+            ]
+        )
+        deadline = time.perf_counter() + timeout
+        while any(await client.read_values(predict_nodes)):
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Timed out waiting for the bridge")
+            await asyncio.sleep(0.02)
+        return connected, time.perf_counter()
+    finally:
+        await client.disconnect()
+
+
+def bench_reconnect(args) -> Dict:
+    """Time for the bridge to serve again after server.py is killed and restarted."""
+    servicer = FakeMLServer(delay=args.delay)
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    with tempfile.TemporaryDirectory() as workdir:
+        config = e2e_config(args, mlserver_grpc_url)
+        config["reconnect"] = {"watchdog_interval": 0.2, "min_delay": 0.1, "max_delay": 1.0}
+        with open(os.path.join(workdir, "opcua_config.yml"), "w") as file:
+            yaml.safe_dump(config, file)
+
+        def start(script: str) -> subprocess.Popen:
+            return subprocess.Popen(
+                [sys.executable, os.path.join(REPO_DIR, script)],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+        opcua_server = start("server.py")
+        bridge = start("mlserver_grpc.py")
+        recoveries, outages = [], []
+        try:
+            asyncio.run(all_predictions_done(config, args.objects, timeout=60))
+            for _ in range(args.iterations):
+                opcua_server.kill()
+                opcua_server.wait()
+                killed = time.perf_counter()
+                time.sleep(args.downtime)
+                opcua_server = start("server.py")
+                # The restarted server sets predict on every object again.
+                up, done = asyncio.run(all_predictions_done(config, args.objects, timeout=60))
+                outages.append(done - killed)
+                recoveries.append(done - up)
+            if bridge.poll() is not None:
+                raise RuntimeError("The bridge exited instead of reconnecting")
+        finally:
+            for process in (opcua_server, bridge):
+                process.terminate()
+                process.wait()
+            server.stop(grace=None)
+
+    return {
+        "objects": args.objects,
+        "downtime_s": args.downtime,
+        # Includes the downtime and the server's own startup.
+        "kill_to_served": summarize(outages),
+        "server_up_to_served": summarize(recoveries),
+    }
+
+
+class OutputRecorder:
+    """Records every output value notified per node."""
+
+    def __init__(self):
+        self.values: Dict = {}
+
+    def datachange_notification(self, node, val, data):
+        self.values.setdefault(node, []).append(val[0] if isinstance(val, list) else val)
+
+
+async def drive_pipeline(args, config: Dict) -> Dict:
+    """Change the inputs of every object at ``--rate`` and count the outputs written."""
+    await all_predictions_done(config, args.objects, timeout=60)
+    client = await connect(config["opcua_server_url"])
+    try:
+        resolver = NodeResolver(client, config["opcua_namespace"])
+        nsidx = await resolver.get_namespace_index()
+        paths = []
+        for i in range(args.objects):
+            base = ["0:Objects", f"{nsidx}:Bench", f"{nsidx}:Machine{i}"]
+            paths += [base + [f"{nsidx}:weight_of_platform"], base + [f"{nsidx}:total_weight"]]
+        nodes = await resolver.resolve(paths)
+        input_nodes, output_nodes = nodes[0::2], nodes[1::2]
+        recorder = OutputRecorder()
+        subscription = await client.create_subscription(10, recorder)
+        for node in output_nodes:
+            await subscription.subscribe_data_change(node, sampling_interval=0, queuesize=1000)
+        await asyncio.sleep(0.5)
+        recorder.values.clear()
+
+        changes = 0
+        interval = 1.0 / args.rate
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration:
+            changes += 1
+            # Increasing inputs give increasing outputs unless written out of order.
+            await client.write_values(input_nodes, [10 + changes] * len(input_nodes))
+            await asyncio.sleep(max(0.0, start + changes * interval - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(1.0)
+    finally:
+        await client.disconnect()
+
+    outputs = sum(len(values) for values in recorder.values.values())
+    return {
+        "input_changes_per_sec": changes / elapsed,
+        "predictions_per_sec": outputs / elapsed,
+        "out_of_order": sum(
+            later < earlier
+            for values in recorder.values.values()
+            for earlier, later in zip(values, values[1:])
+        ),
+    }
+
+
+def bench_pipeline(args) -> Dict:
+    """Prediction rate of continuous bindings for each pipeline depth."""
+    servicer = FakeMLServer(delay=args.delay)
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        config = e2e_config(args, mlserver_grpc_url)
+        config["trigger"] = {"mode": "continuous", "publishing_interval": 10}
+        processes = []
+
+        def start(script: str) -> subprocess.Popen:
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(REPO_DIR, script)],
+                cwd=workdir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            processes.append(process)
+            return process
+
+        try:
+            opcua_server = None
+            for depth in args.pipeline_depths:
+                config["backpressure"] = {"pipeline_depth": depth}
+                with open(os.path.join(workdir, "opcua_config.yml"), "w") as file:
+                    yaml.safe_dump(config, file)
+                if opcua_server is None:
+                    opcua_server = start("server.py")
+                bridge = start("mlserver_grpc.py")
+                results[depth] = asyncio.run(drive_pipeline(args, config))
+                bridge.terminate()
+                bridge.wait()
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+            server.stop(grace=None)
+    return results
+
+
+BENCHMARKS = {
+    "client": bench_client,
+    "balancing": bench_balancing,
+    "batching": bench_batching,
+    "encoding": bench_encoding,
+    "workers": bench_workers,
+    "e2e": bench_e2e,
+    "pipeline": bench_pipeline,
+    "reconnect": bench_reconnect,
+    "rollout": bench_rollout,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks against a local fake MLServer")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0, help="Fake model delay in seconds")
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent callers")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per run")
+    parser.add_argument(
+        "--windows", type=float, nargs="+", default=[0.5, 1, 2, 5, 10], help="Batching windows in ms"
+    )
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument(
+        "--endpoint-delays",
+        type=float,
+        nargs="+",
+        default=[0.005, 0.005, 0.02],
+        help="Model delay in seconds of each fake MLServer for balancing",
+    )
+    parser.add_argument(
+        "--endpoint-workers", type=int, default=2, help="Concurrent requests per fake MLServer"
+    )
+    parser.add_argument("--tail-fraction", type=float, default=0.02, help="Share of slow calls")
+    parser.add_argument("--tail-delay", type=float, default=0.2, help="Extra seconds of slow calls")
+    parser.add_argument("--hedge-after-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--shadow-fraction", type=float, default=0.2, help="Mirrored share of rollout traffic"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1, 1000, 1000000], help="Tensor sizes to encode"
+    )
+    parser.add_argument("--worker-counts", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--array-size", type=int, default=10000, help="Elements per input for the workers benchmark"
+    )
+    parser.add_argument("--objects", type=int, default=10, help="Machines for the e2e benchmark")
+    parser.add_argument("--rate", type=float, default=20.0, help="Triggers per second for e2e")
+    parser.add_argument(
+        "--pipeline-depths", type=int, nargs="+", default=[1, 2, 4], help="Predictions per object"
+    )
+    parser.add_argument("--opcua-port", type=int, default=48400)
+    parser.add_argument(
+        "--downtime", type=float, default=2.0, help="Seconds server.py stays down for reconnect"
+    )
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = BENCHMARKS[args.benchmark](args)
+    report = json.dumps(
+        {
+            "benchmark": args.benchmark,
+            "timestamp": time.time(),
+            "arguments": vars(args),
+            "results": results,
+        },
+        indent=2,
+    )
+    print(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
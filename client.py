@@ -2,6 +2,8 @@ import asyncio
 
 from asyncua import Client
 
+from node_resolver import NodeResolver
+
 url = "opc.tcp://localhost:4840/factoryml/server/"
 namespace = "http://factoryml.alexandra.dk"
 
@@ -13,26 +15,25 @@ def call_addition_model(val_a, val_b):
 async def main():
     print(f"Connecting to {url} ...")
     async with Client(url=url) as client:
+        resolver = NodeResolver(client, namespace)
         # Find the namespace index
-        nsidx = await client.get_namespace_index(namespace)
+        nsidx = await resolver.get_namespace_index()
         print(f"Namespace Index for '{namespace}': {nsidx}")
 
-        # Get the variable node for read / write
-        a = await client.nodes.root.get_child(
-            ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:a"]
+        # Get the variable nodes for read / write in one batched browse
+        a, b, sum = await resolver.resolve(
+            [
+                ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:a"],
+                ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:a"],
+                ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:sum"],
+            ]
         )
         val_a = await a.read_value()
         print(f"Value of a ({a}): {val_a}")
 
-        b = await client.nodes.root.get_child(
-            ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:a"]
-        )
         val_b = await b.read_value()
         print(f"Value of b ({b}): {val_b}")
 
-        sum = await client.nodes.root.get_child(
-            ["0:Objects", f"{nsidx}:MLObject", f"{nsidx}:sum"]
-        )
         val_sum = await sum.read_value()
         print(f"Value of sum ({sum}): {val_sum}")
 
@@ -0,0 +1,164 @@
+import logging
+import time
+from concurrent import futures
+from typing import Callable, Dict, List, Optional
+
+import grpc
+
+import dataplane_pb2
+import dataplane_pb2_grpc
+from tensors import (
+    decode_raw_tensor,
+    encode_raw_tensor,
+    extract_value_from_tensor_content,
+    insert_value_into_tensor_content,
+)
+
+
+def sum_model(input_values: Dict[str, List]) -> Dict[str, List]:
+    columns = list(input_values.values())
+    return {"sum": [sum(row) for row in zip(*columns)]}
+
+
+class FakeMLServer(dataplane_pb2_grpc.GRPCInferenceServiceServicer):
+    """In-process stand-in for MLServer used by the benchmarks.
+
+    Serves a single model whose inputs/outputs are described by
+    ``input_specs``/``output_specs`` (``name``, ``datatype``, ``shape``) and
+    whose predictions are computed by ``model_fn`` after ``delay`` seconds.
+    RepositoryModelLoad loads other models with the same tensors, computed
+    by their function in ``repository`` or else ``model_fn``; ``models``
+    holds the loaded ones.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "pyfunc",
+        input_specs: Optional[List[Dict]] = None,
+        output_specs: Optional[List[Dict]] = None,
+        model_fn: Callable[[Dict[str, List]], Dict[str, List]] = sum_model,
+        delay: float = 0.0,
+        repository: Optional[Dict[str, Callable]] = None,
+    ):
+        self.model_name = model_name
+        self.input_specs = input_specs or [
+            {"name": "a", "datatype": "INT64", "shape": [-1]},
+            {"name": "b", "datatype": "INT64", "shape": [-1]},
+        ]
+        self.output_specs = output_specs or [
+            {"name": "sum", "datatype": "INT64", "shape": [-1]},
+        ]
+        self.model_fn = model_fn
+        self.delay = delay
+        self.repository = repository or {}
+        self.models: Dict[str, Callable] = {model_name: model_fn}
+        self.infer_count = 0
+        self.metadata_count = 0
+
+    def ServerLive(self, request, context):
+        return dataplane_pb2.ServerLiveResponse(live=True)
+
+    def ServerReady(self, request, context):
+        return dataplane_pb2.ServerReadyResponse(ready=True)
+
+    def ModelReady(self, request, context):
+        # Like MLServer, unknown models are NOT_FOUND rather than not ready.
+        if request.name not in self.models:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Model {request.name} not found")
+        return dataplane_pb2.ModelReadyResponse(ready=True)
+
+    def ModelMetadata(self, request, context):
+        self.metadata_count += 1
+        if request.name not in self.models:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Model {request.name} not found")
+        return dataplane_pb2.ModelMetadataResponse(
+            name=request.name,
+            platform="fake",
+            inputs=[
+                dataplane_pb2.ModelMetadataResponse.TensorMetadata(**spec)
+                for spec in self.input_specs
+            ],
+            outputs=[
+                dataplane_pb2.ModelMetadataResponse.TensorMetadata(**spec)
+                for spec in self.output_specs
+            ],
+        )
+
+    def ModelInfer(self, request, context):
+        self.infer_count += 1
+        model_fn = self.models.get(request.model_name)
+        if model_fn is None:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND, f"Model {request.model_name} not found"
+            )
+        if self.delay:
+            time.sleep(self.delay)
+        # Answer in the encoding the request used, as MLServer does.
+        raw_encoding = bool(request.raw_input_contents)
+        if raw_encoding:
+            input_values = {
+                input.name: decode_raw_tensor(
+                    datatype=input.datatype, shape=input.shape, raw_contents=raw_contents
+                ).reshape(-1)
+                for input, raw_contents in zip(
+                    request.inputs, request.raw_input_contents
+                )
+            }
+        else:
+            input_values = {
+                input.name: extract_value_from_tensor_content(
+                    datatype=input.datatype, tensor_contents=input.contents
+                )
+                for input in request.inputs
+            }
+        output_values = model_fn(input_values)
+        outputs = []
+        raw_output_contents = []
+        for spec in self.output_specs:
+            value = output_values[spec["name"]]
+            output = dataplane_pb2.ModelInferResponse.InferOutputTensor(
+                name=spec["name"], datatype=spec["datatype"], shape=[len(value)]
+            )
+            if raw_encoding:
+                raw_output_contents.append(
+                    encode_raw_tensor(datatype=spec["datatype"], input_value=value)[0]
+                )
+            else:
+                output.contents.CopyFrom(
+                    insert_value_into_tensor_content(
+                        datatype=spec["datatype"], input_value=value
+                    )
+                )
+            outputs.append(output)
+        return dataplane_pb2.ModelInferResponse(
+            model_name=request.model_name,
+            model_version=request.model_version,
+            id=request.id,
+            outputs=outputs,
+            raw_output_contents=raw_output_contents,
+        )
+
+    def RepositoryModelLoad(self, request, context):
+        self.models[request.model_name] = self.repository.get(request.model_name, self.model_fn)
+        return dataplane_pb2.RepositoryModelLoadResponse()
+
+    def RepositoryModelUnload(self, request, context):
+        self.models.pop(request.model_name, None)
+        return dataplane_pb2.RepositoryModelUnloadResponse()
+
+
+def start_fake_mlserver(servicer: FakeMLServer, address: str = "localhost:0", max_workers: int = 16):
+    """Start ``servicer`` on ``address`` and return ``(server, host:port)``."""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    dataplane_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(servicer, server)
+    host = address.rsplit(":", 1)[0]
+    port = server.add_insecure_port(address)
+    server.start()
+    logging.info(f"Fake MLServer serving '{servicer.model_name}' on {host}:{port}")
+    return server, f"{host}:{port}"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    server, _ = start_fake_mlserver(FakeMLServer(), address="localhost:8081")
+    server.wait_for_termination()
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class DeadbandGate:
+    """Tells whether input values moved past their deadband since the last prediction.
+
+    Each entry of ``tag_mapping.inputs`` may set ``deadband`` (default 0, any
+    change counts) and ``deadband_type``: ``absolute`` compares the change
+    with the deadband itself, ``percent`` with that percentage of the value
+    used by the last prediction. Array inputs pass if any element does.
+    """
+
+    def __init__(self, inputs: List[Dict]):
+        self.deadbands = {
+            input["name"]: (
+                float(input.get("deadband", 0.0)),
+                input.get("deadband_type", "absolute"),
+            )
+            for input in inputs
+        }
+        self.last: Dict[str, np.ndarray] = {}
+
+    def exceeded(self, input_values: Dict) -> bool:
+        if len(self.last) < len(self.deadbands):
+            return True
+        for name, value in input_values.items():
+            last = self.last[name]
+            current = np.asarray(value, dtype=np.float64)
+            if current.shape != last.shape:
+                return True
+            deadband, deadband_type = self.deadbands[name]
+            if deadband_type == "percent":
+                limit = np.abs(last) * (deadband / 100.0)
+            else:
+                limit = deadband
+            if np.any(np.abs(current - last) > limit):
+                return True
+        return False
+
+    def update(self, input_values: Dict):
+        self.last = {
+            name: np.array(value, dtype=np.float64) for name, value in input_values.items()
+        }
+
+
+class RateLimiter:
+    """Spaces out predictions to at most ``max_rate`` per second (None: no limit)."""
+
+    def __init__(self, max_rate: Optional[float] = None):
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.next_at = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            await asyncio.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
@@ -0,0 +1,655 @@
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import grpc
+
+import dataplane_pb2
+import dataplane_pb2_grpc
+import metrics
+from tensors import TensorCodec, synthetic_input_values
+
+# Keep idle channels open between predictions instead of letting the HTTP/2
+# connection be torn down and re-established on the next trigger.
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+class MetadataCache:
+    """ModelMetadataResponse cache keyed on (model_name, model_version).
+
+    Also keeps the TensorCodec compiled from each cached response, so it is
+    rebuilt only when the metadata is fetched again.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, object]] = {}
+        self._codecs: Dict[Tuple[str, str], TensorCodec] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, model_version: str = ""):
+        with self._lock:
+            entry = self._entries.get((model_name, model_version))
+            if entry is None:
+                return None
+            expires_at, metadata = entry
+            if expires_at < time.monotonic():
+                del self._entries[(model_name, model_version)]
+                self._codecs.pop((model_name, model_version), None)
+                return None
+            return metadata
+
+    def put(self, model_name: str, model_version: str, metadata):
+        with self._lock:
+            self._entries[(model_name, model_version)] = (
+                time.monotonic() + self.ttl,
+                metadata,
+            )
+            self._codecs.pop((model_name, model_version), None)
+
+    def codec(
+        self, model_name: str, model_version: str, metadata, raw_encoding: bool
+    ) -> TensorCodec:
+        """Return the codec compiled from ``metadata``, compiling it on first use."""
+        with self._lock:
+            codec = self._codecs.get((model_name, model_version))
+            if codec is None or codec.raw_encoding != raw_encoding:
+                codec = TensorCodec(metadata, model_name, model_version, raw_encoding)
+                self._codecs[(model_name, model_version)] = codec
+            return codec
+
+    def invalidate(self, model_name: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == model_name]:
+                del self._entries[key]
+                self._codecs.pop(key, None)
+
+
+class ResultCache:
+    """LRU cache of ModelInferResponses keyed on model and encoded inputs.
+
+    Only meant for deterministic models: identical input tensors are
+    answered from the cache for ``ttl`` seconds. Holds at most
+    ``max_entries`` responses and ``max_bytes`` of serialized responses.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, ttl: float = 60.0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: dataplane_pb2.ModelInferRequest) -> Tuple[str, str, bytes]:
+        digest = hashlib.blake2b(digest_size=16)
+        tensors = [input.SerializeToString(deterministic=True) for input in request.inputs]
+        for tensor in [*tensors, *request.raw_input_contents]:
+            digest.update(len(tensor).to_bytes(8, "little"))
+            digest.update(tensor)
+        return request.model_name, request.model_version, digest.digest()
+
+    def get(self, key: Tuple[str, str, bytes]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                metrics.RESULT_CACHE.inc(key[0], "miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.RESULT_CACHE.inc(key[0], "hit")
+            return entry[2]
+
+    def put(self, key: Tuple[str, str, bytes], response: dataplane_pb2.ModelInferResponse):
+        size = response.ByteSize()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, response)
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, model_name: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == model_name]:
+                self._pop(key)
+
+    def _pop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+
+class InferenceClient:
+    """Long-lived MLServer client owning a pool of gRPC channels.
+
+    Model metadata is fetched once per (model_name, model_version) and reused
+    until it expires or the model is (un)loaded through this client. Models
+    in ``raw_encoding_models`` send their inputs as ``raw_input_contents``,
+    models in ``result_caches`` answer repeated inputs from their ResultCache.
+    """
+
+    def __init__(
+        self,
+        mlserver_grpc_url: str,
+        pool_size: int = 1,
+        metadata_ttl: float = 300.0,
+        raw_encoding_models: Iterable[str] = (),
+        result_caches: Optional[Dict[str, ResultCache]] = None,
+    ):
+        self.mlserver_grpc_url = mlserver_grpc_url
+        self.metadata_cache = MetadataCache(ttl=metadata_ttl)
+        self.raw_encoding_models = set(raw_encoding_models)
+        self.result_caches = result_caches or {}
+        self._channels: List[grpc.Channel] = [
+            grpc.insecure_channel(target=mlserver_grpc_url, options=CHANNEL_OPTIONS)
+            for _ in range(max(1, pool_size))
+        ]
+        self._stubs = [
+            dataplane_pb2_grpc.GRPCInferenceServiceStub(channel=channel)
+            for channel in self._channels
+        ]
+        self._next_stub = itertools.cycle(self._stubs)
+
+    @property
+    def stub(self) -> dataplane_pb2_grpc.GRPCInferenceServiceStub:
+        return next(self._next_stub)
+
+    def model_metadata(
+        self, model_name: str, model_version: str = ""
+    ) -> dataplane_pb2.ModelMetadataResponse:
+        model_metadata = self.metadata_cache.get(model_name, model_version)
+        if model_metadata is None:
+            logging.info(f"Gathering model request specification for {model_name}...")
+            with metrics.span("metadata", model_name):
+                model_metadata = self.stub.ModelMetadata(
+                    dataplane_pb2.ModelMetadataRequest(
+                        name=model_name, version=model_version
+                    )
+                )
+            logging.info(f"\n----DISCOVERED INPUT SPEC----\n {model_metadata.inputs}")
+            logging.info(
+                f"\n----DISCOVERED OUTPUT SPEC----\n {model_metadata.outputs}"
+            )
+            self.metadata_cache.put(model_name, model_version, model_metadata)
+        return model_metadata
+
+    def codec(self, model_name: str, model_version: str = "") -> TensorCodec:
+        model_metadata = self.model_metadata(model_name, model_version)
+        return self.metadata_cache.codec(
+            model_name,
+            model_version,
+            model_metadata,
+            raw_encoding=model_name in self.raw_encoding_models,
+        )
+
+    def infer(self, model_name: str, input_values: Dict, model_version: str = "") -> Dict:
+        codec = self.codec(model_name, model_version)
+        with metrics.span("encode", model_name):
+            model_inference_req = codec.encode(input_values)
+        result_cache = self.result_caches.get(model_name)
+        if result_cache is not None:
+            cache_key = result_cache.key(model_inference_req)
+            model_inference_res = result_cache.get(cache_key)
+            if model_inference_res is not None:
+                return codec.decode(model_inference_res)
+        with metrics.span("infer", model_name):
+            model_inference_res: dataplane_pb2.ModelInferResponse = self.stub.ModelInfer(
+                model_inference_req
+            )
+        if result_cache is not None:
+            result_cache.put(cache_key, model_inference_res)
+        with metrics.span("decode", model_name):
+            return codec.decode(model_inference_res)
+
+    def load_model(self, model_name: str, repository_name: str = ""):
+        self.stub.RepositoryModelLoad(
+            dataplane_pb2.RepositoryModelLoadRequest(
+                repository_name=repository_name, model_name=model_name
+            )
+        )
+        self.metadata_cache.invalidate(model_name)
+        if model_name in self.result_caches:
+            self.result_caches[model_name].invalidate(model_name)
+
+    def unload_model(self, model_name: str, repository_name: str = ""):
+        self.stub.RepositoryModelUnload(
+            dataplane_pb2.RepositoryModelUnloadRequest(
+                repository_name=repository_name, model_name=model_name
+            )
+        )
+        self.metadata_cache.invalidate(model_name)
+        if model_name in self.result_caches:
+            self.result_caches[model_name].invalidate(model_name)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Errors after which a request is sent to another endpoint instead.
+FAILOVER_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.NOT_FOUND)
+
+
+class Endpoint:
+    """One MLServer of an AsyncInferenceClient, its channels and routing state.
+
+    ``outstanding`` counts the requests in flight. The endpoint is skipped
+    while not ``healthy``, and for the models in ``unready``.
+    """
+
+    def __init__(self, url: str, pool_size: int = 1):
+        self.url = url
+        self.channels: List[grpc.aio.Channel] = [
+            grpc.aio.insecure_channel(target=url, options=CHANNEL_OPTIONS)
+            for _ in range(max(1, pool_size))
+        ]
+        self.stubs = [
+            dataplane_pb2_grpc.GRPCInferenceServiceStub(channel=channel)
+            for channel in self.channels
+        ]
+        self._next_stub = itertools.cycle(self.stubs)
+        self.outstanding = 0
+        self.healthy = True
+        self.unready: Set[str] = set()
+
+    @property
+    def stub(self) -> dataplane_pb2_grpc.GRPCInferenceServiceStub:
+        return next(self._next_stub)
+
+    def available(self, model_name: str = "") -> bool:
+        return self.healthy and model_name not in self.unready
+
+
+class AsyncInferenceClient:
+    """grpc.aio counterpart of InferenceClient for use inside an event loop.
+
+    Calls never block the loop, so OPC UA traffic and many concurrent
+    ``infer`` calls can overlap. Must be created while the loop is running.
+
+    ``mlserver_grpc_url`` may list several comma separated endpoints serving
+    the same models. Requests then go to the endpoint with the fewest
+    outstanding requests, endpoints failing their ``ServerReady`` and
+    ``ModelReady`` checks every ``health_interval`` seconds are skipped, and
+    a request failing on one endpoint is retried on the next. With
+    ``hedge_after`` a ``ModelInfer`` still unanswered after that many seconds
+    is also sent to a second endpoint and the first answer is used.
+    """
+
+    def __init__(
+        self,
+        mlserver_grpc_url: str,
+        pool_size: int = 1,
+        metadata_ttl: float = 300.0,
+        raw_encoding_models: Iterable[str] = (),
+        result_caches: Optional[Dict[str, ResultCache]] = None,
+        health_interval: float = 5.0,
+        hedge_after: Optional[float] = None,
+    ):
+        self.mlserver_grpc_url = mlserver_grpc_url
+        self.metadata_cache = MetadataCache(ttl=metadata_ttl)
+        self.raw_encoding_models = set(raw_encoding_models)
+        self.result_caches = result_caches or {}
+        self.endpoints = [
+            Endpoint(url.strip(), pool_size) for url in mlserver_grpc_url.split(",")
+        ]
+        self.health_interval = health_interval
+        self.hedge_after = hedge_after
+        # Predictions in flight per (model_name, model_version).
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        # Models whose readiness the health checks ask every endpoint about.
+        self._models: Set[str] = set()
+        self._rotation = 0
+        self._health_task: Optional[asyncio.Task] = None
+        if len(self.endpoints) > 1:
+            self._health_task = asyncio.ensure_future(self._check_health())
+
+    @property
+    def stub(self) -> dataplane_pb2_grpc.GRPCInferenceServiceStub:
+        return self._pick().stub
+
+    async def model_metadata(
+        self, model_name: str, model_version: str = ""
+    ) -> dataplane_pb2.ModelMetadataResponse:
+        model_metadata = self.metadata_cache.get(model_name, model_version)
+        if model_metadata is None:
+            self._models.add(model_name)
+            logging.info(f"Gathering model request specification for {model_name}...")
+            request = dataplane_pb2.ModelMetadataRequest(name=model_name, version=model_version)
+            with metrics.span("metadata", model_name):
+                model_metadata = await self._route(
+                    model_name, lambda stub: stub.ModelMetadata(request), hedge=False
+                )
+            logging.info(f"\n----DISCOVERED INPUT SPEC----\n {model_metadata.inputs}")
+            logging.info(
+                f"\n----DISCOVERED OUTPUT SPEC----\n {model_metadata.outputs}"
+            )
+            self.metadata_cache.put(model_name, model_version, model_metadata)
+        return model_metadata
+
+    async def codec(self, model_name: str, model_version: str = "") -> TensorCodec:
+        model_metadata = await self.model_metadata(model_name, model_version)
+        return self.metadata_cache.codec(
+            model_name,
+            model_version,
+            model_metadata,
+            raw_encoding=model_name in self.raw_encoding_models,
+        )
+
+    async def model_infer(
+        self, request: dataplane_pb2.ModelInferRequest
+    ) -> dataplane_pb2.ModelInferResponse:
+        """Send a ModelInfer to the least loaded available endpoint."""
+        return await self._route(request.model_name, lambda stub: stub.ModelInfer(request))
+
+    async def infer(
+        self, model_name: str, input_values: Dict, model_version: str = ""
+    ) -> Dict:
+        with self.track(model_name, model_version):
+            codec = await self.codec(model_name, model_version)
+            with metrics.span("encode", model_name):
+                model_inference_req = codec.encode(input_values)
+            result_cache = self.result_caches.get(model_name)
+            if result_cache is not None:
+                cache_key = result_cache.key(model_inference_req)
+                model_inference_res = result_cache.get(cache_key)
+                if model_inference_res is not None:
+                    return codec.decode(model_inference_res)
+            with metrics.span("infer", model_name):
+                model_inference_res = await self.model_infer(model_inference_req)
+            if result_cache is not None:
+                result_cache.put(cache_key, model_inference_res)
+            with metrics.span("decode", model_name):
+                return codec.decode(model_inference_res)
+
+    @contextlib.contextmanager
+    def track(self, model_name: str, model_version: str = ""):
+        """Count a prediction of this model version as in flight, see ``drain``."""
+        key = (model_name, model_version)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self.in_flight[key] -= 1
+
+    async def drain(
+        self, model_name: str, model_version: str = "", timeout: Optional[float] = None
+    ):
+        """Wait until no prediction of this model version is in flight any more."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.in_flight.get((model_name, model_version)):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"{self.in_flight[(model_name, model_version)]} predictions of"
+                    f" {model_name} still in flight after {timeout}s"
+                )
+            await asyncio.sleep(0.01)
+
+    async def wait_until_ready(
+        self,
+        model_name: str,
+        timeout: Optional[float] = None,
+        interval: float = 1.0,
+        model_version: str = "",
+    ):
+        """Poll ModelReady until ``model_name`` is ready on at least one endpoint.
+
+        Endpoints where it is not ready yet are skipped until a later health
+        check finds it ready. With a ``model_version`` only that version is
+        polled and routing is left alone, other versions may still serve.
+        Raises TimeoutError after ``timeout`` seconds.
+        """
+        self._models.add(model_name)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if model_version:
+                ready = await asyncio.gather(
+                    *(
+                        self._model_ready(endpoint, model_name, model_version)
+                        for endpoint in self.endpoints
+                    ),
+                    return_exceptions=True,
+                )
+                if any(endpoint_ready is True for endpoint_ready in ready):
+                    return
+            else:
+                await asyncio.gather(
+                    *(self._check_endpoint(endpoint) for endpoint in self.endpoints)
+                )
+                if any(endpoint.available(model_name) for endpoint in self.endpoints):
+                    return
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Model {model_name} not ready after {timeout}s")
+            logging.info(f"Waiting for model {model_name} to be ready...")
+            await asyncio.sleep(interval)
+
+    async def warm_up(self, model_name: str, requests: int = 1, model_version: str = ""):
+        """Fetch the metadata and send ``requests`` synthetic ModelInfers to every ready endpoint.
+
+        The inputs are zeros shaped from the model's TensorMetadata, and the
+        responses are not cached. A failing endpoint only logs a warning.
+        """
+        codec = await self.codec(model_name, model_version)
+        model_metadata = await self.model_metadata(model_name, model_version)
+        request = codec.encode(synthetic_input_values(model_metadata.inputs))
+
+        async def warm_up_endpoint(endpoint: Endpoint):
+            latencies = []
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    await self._send(endpoint, lambda stub: stub.ModelInfer(request))
+                    latencies.append(time.perf_counter() - start)
+            except grpc.aio.AioRpcError as e:
+                logging.warning(f"Warmup of {model_name} on {endpoint.url} failed: {e.code().name}")
+                return
+            if latencies:
+                logging.info(
+                    f"Warmed up {model_name} on {endpoint.url} with {requests} requests,"
+                    f" first {latencies[0] * 1000:.1f}ms, last {latencies[-1] * 1000:.1f}ms"
+                )
+
+        with metrics.span("warmup", model_name):
+            await asyncio.gather(
+                *(
+                    warm_up_endpoint(endpoint)
+                    for endpoint in self.endpoints
+                    if endpoint.available(model_name)
+                )
+            )
+
+    async def load_model(self, model_name: str, repository_name: str = ""):
+        request = dataplane_pb2.RepositoryModelLoadRequest(
+            repository_name=repository_name, model_name=model_name
+        )
+        await asyncio.gather(
+            *(endpoint.stub.RepositoryModelLoad(request) for endpoint in self.endpoints)
+        )
+        self.metadata_cache.invalidate(model_name)
+        if model_name in self.result_caches:
+            self.result_caches[model_name].invalidate(model_name)
+
+    async def unload_model(self, model_name: str, repository_name: str = ""):
+        request = dataplane_pb2.RepositoryModelUnloadRequest(
+            repository_name=repository_name, model_name=model_name
+        )
+        await asyncio.gather(
+            *(endpoint.stub.RepositoryModelUnload(request) for endpoint in self.endpoints)
+        )
+        self._models.discard(model_name)
+        self.metadata_cache.invalidate(model_name)
+        if model_name in self.result_caches:
+            self.result_caches[model_name].invalidate(model_name)
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for endpoint in self.endpoints:
+            for channel in endpoint.channels:
+                await channel.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _pick(self, model_name: str = "", exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """The available endpoint with the fewest outstanding requests.
+
+        Falls back to unavailable endpoints, which may have recovered since
+        their last check, and returns None once all are excluded.
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        candidates = [
+            endpoint for endpoint in candidates if endpoint.available(model_name)
+        ] or candidates
+        if not candidates:
+            return None
+        # Start at a rotating offset so ties do not all go to the first endpoint.
+        self._rotation = (self._rotation + 1) % len(candidates)
+        candidates = candidates[self._rotation :] + candidates[: self._rotation]
+        return min(candidates, key=lambda endpoint: endpoint.outstanding)
+
+    async def _send(self, endpoint: Endpoint, call: Callable):
+        endpoint.outstanding += 1
+        try:
+            return await call(endpoint.stub)
+        finally:
+            endpoint.outstanding -= 1
+
+    async def _route(self, model_name: str, call: Callable, hedge: bool = True):
+        """Run ``call(stub)`` on the best endpoint, failing over and hedging."""
+        endpoint = self._pick(model_name)
+        if len(self.endpoints) == 1:
+            return await self._send(endpoint, call)
+        tried = [endpoint]
+        pending = {asyncio.ensure_future(self._send(endpoint, call)): endpoint}
+        hedge_after = self.hedge_after if hedge else None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Only one hedged request per call.
+                    hedge_after = None
+                    endpoint = self._pick(model_name, exclude=tried)
+                    if endpoint is not None:
+                        metrics.RETRIES.inc("hedge")
+                        tried.append(endpoint)
+                        pending[asyncio.ensure_future(self._send(endpoint, call))] = endpoint
+                    continue
+                for task in done:
+                    failed = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if (
+                        not isinstance(error, grpc.aio.AioRpcError)
+                        or error.code() not in FAILOVER_CODES
+                    ):
+                        raise error
+                    self._mark_down(failed, model_name, error)
+                if not pending:
+                    endpoint = self._pick(model_name, exclude=tried)
+                    if endpoint is None:
+                        raise error
+                    metrics.RETRIES.inc("failover")
+                    tried.append(endpoint)
+                    pending[asyncio.ensure_future(self._send(endpoint, call))] = endpoint
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _mark_down(self, endpoint: Endpoint, model_name: str, error: grpc.aio.AioRpcError):
+        logging.warning(
+            f"MLServer {endpoint.url} failed {model_name}: {error.code().name}, failing over"
+        )
+        if error.code() == grpc.StatusCode.NOT_FOUND:
+            endpoint.unready.add(model_name)
+        else:
+            endpoint.healthy = False
+
+    async def _check_health(self):
+        while True:
+            await asyncio.gather(*(self._check_endpoint(endpoint) for endpoint in self.endpoints))
+            await asyncio.sleep(self.health_interval)
+
+    async def _check_endpoint(self, endpoint: Endpoint):
+        try:
+            response = await endpoint.stub.ServerReady(
+                dataplane_pb2.ServerReadyRequest(), timeout=self.health_interval
+            )
+            healthy = response.ready
+        except grpc.aio.AioRpcError:
+            healthy = False
+        unready = endpoint.unready
+        if healthy:
+            unready = set()
+            for model_name in list(self._models):
+                # MLServer answers NOT_FOUND for a model it has not loaded, which
+                # says nothing about the other models of the endpoint.
+                try:
+                    if not await self._model_ready(endpoint, model_name):
+                        unready.add(model_name)
+                except grpc.aio.AioRpcError:
+                    unready.add(model_name)
+        if healthy != endpoint.healthy or unready != endpoint.unready:
+            logging.info(
+                f"MLServer {endpoint.url} is {'ready' if healthy else 'not ready'}"
+                + (f", models not ready: {sorted(unready)}" if unready else "")
+            )
+        endpoint.healthy = healthy
+        endpoint.unready = unready
+
+    async def _model_ready(
+        self, endpoint: Endpoint, model_name: str, model_version: str = ""
+    ) -> bool:
+        response = await endpoint.stub.ModelReady(
+            dataplane_pb2.ModelReadyRequest(name=model_name, version=model_version),
+            timeout=self.health_interval,
+        )
+        return response.ready
+
+
+_clients: Dict[str, InferenceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_inference_client(mlserver_grpc_url: str) -> InferenceClient:
+    """Return the process-wide client for an MLServer endpoint."""
+    with _clients_lock:
+        client = _clients.get(mlserver_grpc_url)
+        if client is None:
+            client = InferenceClient(mlserver_grpc_url)
+            _clients[mlserver_grpc_url] = client
+        return client
@@ -0,0 +1,207 @@
+import contextlib
+import http.server
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Stage latency buckets in seconds, from sub-millisecond encodes to slow models.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Nothing is recorded until `enable` is called, spans are then a shared no-op.
+_enabled = False
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames: Tuple[str, ...], labels: Tuple[str, ...], **extra) -> str:
+    pairs = [*zip(labelnames, labels), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(str(value))}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if _enabled:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        # dict() copies atomically, the HTTP thread never sees a resize.
+        for labels, value in dict(self._values).items():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label set: one count per bucket plus +Inf, and the sum.
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        if not _enabled:
+            return
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, counts in dict(self._counts).items():
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], list(counts)):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, le=bound)
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_string = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_string} {self._sums[labels]}"
+            yield f"{self.name}_count{label_string} {cumulative}"
+
+
+STAGE_SECONDS = Histogram(
+    "bridge_stage_seconds",
+    "Time spent per prediction stage (browse, read, metadata, encode, infer, decode, write, total)",
+    ("stage", "model"),
+)
+STAGE_ERRORS = Counter(
+    "bridge_stage_errors_total", "Prediction stages that raised", ("stage", "model")
+)
+PREDICTIONS = Counter(
+    "bridge_predictions_total", "Predictions written back to OPC UA", ("model",)
+)
+RETRIES = Counter(
+    "bridge_retries_total", "Operations retried after a recoverable error", ("reason",)
+)
+RESULT_CACHE = Counter(
+    "bridge_result_cache_requests_total", "Result cache lookups", ("model", "result")
+)
+SUPPRESSED_TRIGGERS = Counter(
+    "bridge_suppressed_triggers_total",
+    "Triggers that did not get a prediction of their own: within the deadband, coalesced"
+    " by the rate limit or the queue, or dropped or rejected by a full queue",
+    ("model", "reason"),
+)
+SHADOW_SECONDS = Histogram(
+    "bridge_shadow_seconds",
+    "Inference latency of mirrored predictions, of the production and the shadow model",
+    ("model", "variant"),
+)
+SHADOW_DIFFERENCE = Histogram(
+    "bridge_shadow_difference",
+    "Largest absolute output difference between the shadow and the production model",
+    ("model",),
+    buckets=(0.0, 1e-6, 1e-4, 0.01, 0.1, 1.0, 10.0, 100.0),
+)
+SHADOW_RESULTS = Counter(
+    "bridge_shadow_results_total",
+    "Mirrored predictions by outcome (match, mismatch, error, skipped), unavailable candidates",
+    ("model", "result"),
+)
+METRICS = [
+    STAGE_SECONDS,
+    STAGE_ERRORS,
+    PREDICTIONS,
+    RETRIES,
+    RESULT_CACHE,
+    SUPPRESSED_TRIGGERS,
+    SHADOW_SECONDS,
+    SHADOW_DIFFERENCE,
+    SHADOW_RESULTS,
+]
+
+
+class Span:
+    """Times one stage into STAGE_SECONDS and counts it in STAGE_ERRORS if it raises."""
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, stage: str, model: str):
+        self.labels = (stage, model)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, *self.labels)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(*self.labels)
+        return False
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def span(stage: str, model: str = ""):
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(stage, model)
+
+
+def render() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the bridge log.
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> http.server.ThreadingHTTPServer:
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def configure(metrics_config: Optional[Dict]) -> Optional[http.server.ThreadingHTTPServer]:
+    """Enable metrics for a ``metrics`` config section, serving them if it has a port."""
+    if metrics_config is None:
+        return None
+    enable()
+    if metrics_config.get("port") is None:
+        return None
+    return start_http_server(metrics_config["port"], metrics_config.get("host", "127.0.0.1"))
@@ -1,209 +1,638 @@
 import asyncio
 import logging
-from typing import Dict, List
+import time
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Set, Union
 
 import grpc
 import yaml
-from asyncua import Client
-
-import dataplane_pb2
-import dataplane_pb2_grpc
+from asyncua import Client, Node, ua
+
+import metrics
+from backpressure import PredictionQueue
+from batching import MicroBatcher
+from gating import DeadbandGate, RateLimiter
+from inference_client import AsyncInferenceClient, ResultCache, get_inference_client
+from model_bindings import (
+    STATUS_TAGS,
+    ModelBinding,
+    get_model_bindings,
+    resolve_bindings,
+    resolve_status_nodes,
+)
+from node_resolver import NodeResolver, read_values
+from rollout import Shadow, format_model_target, parse_model_target, switch_model
+from session import CONNECTION_ERRORS, SessionManager
+from windows import RingBuffer
 
 
 def call_model(mlserver_grpc_url: str, model_name: str, input_values: Dict) -> Dict:
     logging.info(f"\n---INPUT VALUES---\n {input_values}")
 
-    channel = grpc.insecure_channel(target=mlserver_grpc_url)
-    stub = dataplane_pb2_grpc.GRPCInferenceServiceStub(channel=channel)
+    logging.info("Calling model inference...")
+    output_values = get_inference_client(mlserver_grpc_url).infer(
+        model_name, input_values
+    )
 
-    logging.info("Gathering model request specification...")
+    logging.info(f"\n----OUTPUT VALUES----\n {output_values}")
 
-    model_metadata_req = dataplane_pb2.ModelMetadataRequest(name=model_name)
+    return output_values
 
-    model_metadata: dataplane_pb2.ModelMetadataResponse = stub.ModelMetadata(
-        model_metadata_req
-    )
 
-    logging.info(f"\n----DISCOVERED INPUT SPEC----\n {model_metadata.inputs}")
-    logging.info(f"\n----DISCOVERED OUTPUT SPEC----\n {model_metadata.outputs}")
+def to_opcua_value(value):
+    # Raw-encoded outputs are NumPy arrays and typed ones protobuf repeated
+    # fields, asyncua can wrap neither in a Variant.
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, Sequence) and not isinstance(value, (bytes, str, list)):
+        return list(value)
+    return value
 
-    logging.info("Calling model inference...")
 
-    inference_inputs = generate_infer_inputs(
-        inputs_metadata=model_metadata.inputs, inputs_values=input_values
-    )
+def load_config():
+    with open("opcua_config.yml", "r") as file:
+        config = yaml.safe_load(file)
+    return config
 
-    model_inference_req = dataplane_pb2.ModelInferRequest(
-        model_name=model_name, inputs=inference_inputs
-    )
 
-    model_inference_res: dataplane_pb2.ModelInferResponse = stub.ModelInfer(
-        model_inference_req
-    )
+async def call_model_async(
+    inference_client: Union[AsyncInferenceClient, MicroBatcher],
+    model_name: str,
+    input_values: Dict,
+    model_version: str = "",
+) -> Dict:
+    logging.info(f"\n---INPUT VALUES---\n {input_values}")
 
-    output_values = parse_output_values(model_inference_res.outputs)
+    logging.info("Calling model inference...")
+    output_values = await inference_client.infer(model_name, input_values, model_version)
 
     logging.info(f"\n----OUTPUT VALUES----\n {output_values}")
 
     return output_values
 
 
-def generate_infer_inputs(
-    inputs_metadata: List[dataplane_pb2.ModelMetadataResponse.TensorMetadata],
-    inputs_values: Dict,
+async def read_input_values(
+    client: Client, input_objs: Dict[str, Node], model_name: str = ""
+) -> Dict:
+    with metrics.span("read", model_name):
+        values = await read_values(client, list(input_objs.values()))
+    return dict(zip(input_objs, values))
+
+
+async def run_prediction(
+    client: Client,
+    inference_client: Union[AsyncInferenceClient, MicroBatcher],
+    binding: ModelBinding,
+    input_values: Optional[Dict] = None,
+    write_after: Optional[asyncio.Event] = None,
+    shadow: Optional[Shadow] = None,
 ):
-    input_iterable: List[dataplane_pb2.ModelInferRequest.InferInputTensor] = []
-
-    for input in inputs_metadata:
-        input_value = inputs_values[input.name]
-        if not hasattr(input_value, "__iter__"):
-            input_value = [input_value]
-        input_tensor_contents = insert_value_into_tensor_content(
-            datatype=input.datatype, input_value=input_value
-        )
-
-        input_iterable.append(
-            dataplane_pb2.ModelInferRequest.InferInputTensor(
-                name=input.name,
-                datatype=input.datatype,
-                shape=input.shape,
-                parameters=input.parameters,
-                contents=input_tensor_contents,
+    """Read, infer and write one prediction of ``binding``.
+
+    With ``write_after`` the outputs are only written once that event is set,
+    so pipelined predictions of one object keep their order. With a
+    ``shadow`` the prediction may also be mirrored to a candidate model.
+    """
+    with metrics.span("total", binding.model_name):
+        if input_values is None:
+            input_values = await read_input_values(
+                client, binding.input_objs, binding.model_name
             )
-        )
-    return input_iterable
-
 
-def parse_output_values(
-    model_infer_outputs: List[dataplane_pb2.ModelInferResponse.InferOutputTensor],
-) -> Dict:
-    output_values = {}
-    for infer_output in model_infer_outputs:
-        output_value = extract_value_from_tensor_content(
-            datatype=infer_output.datatype, tensor_contents=infer_output.contents
+        start = time.perf_counter()
+        output_values = await call_model_async(
+            inference_client, binding.model_name, input_values, binding.model_version
         )
-        if is_shape_scalar(infer_output.shape):
-            output_value = output_value[0]
-        output_values[infer_output.name] = output_value
-    return output_values
-
-def is_shape_scalar(shape):
-    for dim in shape:
-        if (dim!=1) and (dim!=-1):
-            return False
-    return True
+        if shadow is not None:
+            shadow.mirror(binding, input_values, output_values, time.perf_counter() - start)
+
+        if write_after is not None:
+            await write_after.wait()
+        # Outputs and the predict reset go out in a single Write service call.
+        with metrics.span("write", binding.model_name):
+            await client.write_values(
+                [*binding.output_objs.values(), binding.predict_obj],
+                [
+                    *(to_opcua_value(output_values[name]) for name in binding.output_objs),
+                    False,
+                ],
+            )
+    metrics.PREDICTIONS.inc(binding.model_name)
 
 
-def insert_value_into_tensor_content(
-    datatype: str, input_value
-) -> dataplane_pb2.InferTensorContents:
-    if datatype == "BOOL":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            bool_contents=input_value
-        )
-    elif datatype == "BYTES":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            bytes_contents=input_value
-        )
-    elif datatype == "FP32":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            fp32_contents=input_value
-        )
-    elif datatype == "FP64":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            fp64_contents=input_value
-        )
-    elif datatype == "INT64":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            int64_contents=input_value
-        )
-    elif datatype == "INT32":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            int_contents=input_value
-        )
-    elif datatype == "UINT32":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            uint64_contents=input_value
+async def predict_once(
+    client: Client,
+    inference_client: Union[AsyncInferenceClient, MicroBatcher],
+    binding: ModelBinding,
+    shadow: Optional[Shadow] = None,
+):
+    # Read predict together with the inputs so a prediction needs one Read.
+    with metrics.span("read", binding.model_name):
+        predict, *values = await read_values(
+            client, [binding.predict_obj, *binding.input_objs.values()]
         )
-    elif datatype == "UINT64":
-        input_tensor_contents = dataplane_pb2.InferTensorContents(
-            uint_contents=input_value
+
+    if predict:
+        logging.info(f"Predict is enabled on '{binding.name}' continuing with prediction...")
+        await run_prediction(
+            client,
+            inference_client,
+            binding,
+            input_values=dict(zip(binding.input_objs, values)),
+            shadow=shadow,
         )
     else:
-        raise ValueError(f"Unknown input tensor datatype: {datatype} !")
-    return input_tensor_contents
+        logging.info(f"Predict is disabled on '{binding.name}' skipping prediction...")
 
 
-def extract_value_from_tensor_content(
-    datatype: str, tensor_contents: dataplane_pb2.InferTensorContents
+class TriggerHandler:
+    """Forwards asyncua data-change notifications to the bridge loop.
+
+    Samples of windowed inputs go straight into their RingBuffer instead,
+    they never trigger a prediction themselves.
+    """
+
+    def __init__(self, windows: Optional[Dict[Node, RingBuffer]] = None):
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.windows = windows or {}
+
+    def datachange_notification(self, node: Node, val, data):
+        window = self.windows.get(node)
+        if window is not None:
+            window.extend(val)
+        else:
+            self.events.put_nowait((node, val))
+
+
+async def watch_binding(client: Client, queue: PredictionQueue, binding: ModelBinding):
+    publishing_interval = binding.trigger.get("publishing_interval", 100)
+    sampling_interval = binding.trigger.get("sampling_interval", 0)
+    windowed = [input for input in binding.inputs if input.get("window")]
+    windows = {
+        binding.input_objs[input["name"]]: RingBuffer(input["window"]) for input in windowed
+    }
+    # Continuous bindings predict on input changes and windows are filled from
+    # notifications, so both need the inputs subscribed.
+    continuous = binding.trigger_mode == "continuous"
+    subscribe_inputs = (
+        binding.trigger.get("subscribe_inputs", False) or continuous or bool(windows)
+    )
+    gate = DeadbandGate([input for input in binding.inputs if not input.get("window")])
+    limiter = RateLimiter(binding.trigger.get("max_rate"))
+
+    handler = TriggerHandler(windows)
+    subscription = await client.create_subscription(publishing_interval, handler)
+    input_names = {
+        input_obj: name
+        for name, input_obj in binding.input_objs.items()
+        if input_obj not in windows
+    }
+    input_values = {}
+    if subscribe_inputs:
+        # Subscribed before predict so the initial input values arrive first.
+        for input in windowed:
+            # Queue every sample between two publishes, not just the latest.
+            await subscription.subscribe_data_change(
+                binding.input_objs[input["name"]],
+                sampling_interval=sampling_interval,
+                queuesize=input.get("queue_size", input["window"]),
+            )
+        if input_names:
+            await subscription.subscribe_data_change(
+                list(input_names), sampling_interval=sampling_interval
+            )
+    await subscription.subscribe_data_change(
+        binding.predict_obj, sampling_interval=sampling_interval
+    )
+    logging.info(f"Waiting for predict triggers on '{binding.name}'...")
+
+    def handle(node: Node, val) -> bool:
+        """Apply one notification, return whether it asks for a prediction."""
+        if node not in input_names:
+            return bool(val)
+        input_values[input_names[node]] = val
+        if not continuous or len(input_values) < len(input_names):
+            return False
+        if gate.exceeded(input_values):
+            return True
+        metrics.SUPPRESSED_TRIGGERS.inc(binding.model_name, "deadband")
+        return False
+
+    while True:
+        if not handle(*await handler.events.get()):
+            continue
+        await limiter.wait()
+        # Notifications queued while rate limited are folded into one prediction.
+        while not handler.events.empty():
+            if handle(*handler.events.get_nowait()):
+                metrics.SUPPRESSED_TRIGGERS.inc(binding.model_name, "coalesced")
+        logging.info(f"Predict is enabled on '{binding.name}' continuing with prediction...")
+        prediction_inputs = dict(input_values) if subscribe_inputs else None
+        if windows:
+            # One copy per prediction, the ring buffers keep filling meanwhile.
+            prediction_inputs.update(
+                (input["name"], windows[binding.input_objs[input["name"]]].window().copy())
+                for input in windowed
+            )
+        if queue.submit(binding, prediction_inputs) and prediction_inputs is not None:
+            gate.update(dict(input_values))
+
+
+async def write_status_values(client: Client, nodes: List[Node], values: List) -> List[Node]:
+    """Write status variables in one Write call, return the nodes that rejected their value.
+
+    A status variable of another type than the bridge writes, such as an
+    Int32 ``dropped``, answers BadTypeMismatch, which is only logged.
+    """
+    results = await client.write_values(nodes, values, raise_on_partial_error=False)
+    failed = []
+    for node, result in zip(nodes, results):
+        if not result.is_good():
+            logging.warning(f"Could not write status variable {node}: {result.name}")
+            failed.append(node)
+    return failed
+
+
+async def write_status(
+    client: Client,
+    queues: Dict[str, PredictionQueue],
+    bindings: List[ModelBinding],
+    interval: float = 1.0,
 ):
-    if datatype == "BOOL":
-        output_value = tensor_contents.bool_contents
-    elif datatype == "BYTES":
-        output_value = tensor_contents.bytes_contents
-    elif datatype == "FP32":
-        output_value = tensor_contents.fp32_contents
-    elif datatype == "FP64":
-        output_value = tensor_contents.fp64_contents
-    elif datatype == "INT64":
-        output_value = tensor_contents.int64_contents
-    elif datatype == "INT32":
-        output_value = tensor_contents.int_contents
-    elif datatype == "UINT32":
-        output_value = tensor_contents.uint_contents
-    elif datatype == "UINT64":
-        output_value = tensor_contents.uint64_contents
-    else:
-        raise ValueError(f"Unknown input tensor datatype: {datatype} !")
-    return output_value
+    """Publish queue depth and dropped count of each binding, in one Write per interval.
+
+    Variables that reject their value are skipped from then on.
+    """
+    written: Dict[Node, int] = {}
+    skipped: Set[Node] = set()
+    while True:
+        await asyncio.sleep(interval)
+        nodes, values = [], []
+        for binding in bindings:
+            queue = queues.get(binding.mlserver_grpc_url)
+            if queue is None:
+                continue
+            status = {
+                "queue_depth": queue.depth(binding),
+                "dropped": queue.dropped.get(binding, 0),
+            }
+            for tag, node in binding.status_objs.items():
+                if tag in status and node not in skipped and written.get(node) != status[tag]:
+                    nodes.append(node)
+                    values.append(ua.Variant(status[tag], STATUS_TAGS[tag]))
+                    written[node] = status[tag]
+        if nodes:
+            skipped.update(await write_status_values(client, nodes, values))
+
+
+async def write_ready(client: Client, bindings: List[ModelBinding], ready: bool):
+    """Set the ``ready`` variable of every binding that has one, in one Write call."""
+    nodes = [binding.status_objs["ready"] for binding in bindings if "ready" in binding.status_objs]
+    if nodes:
+        await write_status_values(
+            client, nodes, [ua.Variant(ready, ua.VariantType.Boolean)] * len(nodes)
+        )
 
 
-def load_config():
-    with open("opcua_config.yml", "r") as file:
-        config = yaml.safe_load(file)
-    return config
+async def watch_model_target(
+    client: Client,
+    inference_client: AsyncInferenceClient,
+    binding: ModelBinding,
+    bindings: List[ModelBinding],
+    switches: Dict[ModelBinding, asyncio.Future],
+    warmup_config: Dict,
+    drain_timeout: float = 30.0,
+):
+    """Switch ``binding`` to the model written to its ``target_model`` variable.
+
+    ``name:version``, ``name`` or ``:version`` are accepted. The model in use
+    is written to ``active_model`` and why the last switch failed, or an
+    empty string once one succeeded, to ``model_error``. Switches run in
+    ``switches``, outside the session, so a dropped session does not leave
+    one half done.
+    """
+    handler = TriggerHandler()
+    subscription = await client.create_subscription(
+        binding.trigger.get("publishing_interval", 100), handler
+    )
+    await subscription.subscribe_data_change(binding.status_objs["target_model"])
+    error: Optional[str] = None
+    while True:
+        status = {"active_model": format_model_target(binding.model_name, binding.model_version)}
+        if error is not None:
+            status["model_error"] = error
+        nodes = [binding.status_objs[tag] for tag in status if tag in binding.status_objs]
+        if nodes:
+            await write_status_values(
+                client,
+                nodes,
+                [
+                    ua.Variant(value, ua.VariantType.String)
+                    for tag, value in status.items()
+                    if tag in binding.status_objs
+                ],
+            )
+        _, target = await handler.events.get()
+        # Only the latest target counts.
+        while not handler.events.empty():
+            _, target = handler.events.get_nowait()
+        if not target:
+            continue
+        try:
+            # A switch started on an earlier session finishes first.
+            if binding in switches and not switches[binding].done():
+                await asyncio.shield(switches[binding])
+            model_name, model_version = parse_model_target(target, binding.model_name)
+            switches[binding] = asyncio.ensure_future(
+                switch_model(
+                    inference_client,
+                    binding,
+                    bindings,
+                    model_name,
+                    model_version,
+                    warmup_config=warmup_config,
+                    drain_timeout=drain_timeout,
+                )
+            )
+            await asyncio.shield(switches[binding])
+            error = ""
+        except Exception as e:
+            # Only the switch runs here, the session's own errors cancel this task.
+            if isinstance(e, grpc.aio.AioRpcError):
+                error = f"Switching to {target} failed: {e.code().name}: {e.details()}"
+            else:
+                error = f"Switching to {target} failed: {e!r}"
+            logging.error(f"'{binding.name}': {error}")
+
+
+async def warm_up_models(
+    inference_clients: Dict[str, AsyncInferenceClient],
+    bindings: List[ModelBinding],
+    warmup_config: Dict,
+):
+    """Wait until every bound model is ready, then warm it up with synthetic requests."""
+
+    async def warm_up(
+        inference_client: AsyncInferenceClient, model_name: str, model_version: str
+    ):
+        await inference_client.wait_until_ready(
+            model_name,
+            timeout=warmup_config.get("ready_timeout"),
+            interval=warmup_config.get("poll_interval", 1.0),
+            model_version=model_version,
+        )
+        await inference_client.warm_up(
+            model_name, requests=warmup_config.get("requests", 1), model_version=model_version
+        )
+
+    models = {
+        (binding.mlserver_grpc_url, binding.model_name, binding.model_version)
+        for binding in bindings
+    }
+    await asyncio.gather(
+        *(
+            warm_up(inference_clients[url], model_name, model_version)
+            for url, model_name, model_version in models
+        )
+    )
+    logging.info("All models are ready, accepting triggers")
+
+
+def create_inference_clients(
+    bindings: List[ModelBinding], load_balancing: Optional[Dict] = None
+) -> Dict[str, AsyncInferenceClient]:
+    """One client, and so one set of channels, per distinct MLServer endpoint (list)."""
+    load_balancing = load_balancing or {}
+    hedge_after_ms = load_balancing.get("hedge_after_ms")
+    inference_clients = {}
+    for binding in bindings:
+        if binding.mlserver_grpc_url not in inference_clients:
+            inference_clients[binding.mlserver_grpc_url] = AsyncInferenceClient(
+                binding.mlserver_grpc_url,
+                raw_encoding_models=[
+                    other.model_name
+                    for other in bindings
+                    if other.raw_encoding
+                    and other.mlserver_grpc_url == binding.mlserver_grpc_url
+                ],
+                result_caches={
+                    other.model_name: ResultCache(**other.result_cache)
+                    for other in bindings
+                    if other.result_cache is not None
+                    and other.mlserver_grpc_url == binding.mlserver_grpc_url
+                },
+                health_interval=load_balancing.get("health_interval", 5.0),
+                hedge_after=hedge_after_ms / 1000 if hedge_after_ms else None,
+            )
+    return inference_clients
 
 
 async def link_opcua_server_and_ml_model(config):
     opcua_server_url = config["opcua_server_url"]
     opcua_namespace = config["opcua_namespace"]
-    model_name = config["model_name"]
-    mlserver_grpc_url = config["mlserver_grpc_url"]
-    inputs = config["tag_mapping"]["inputs"]
-    outputs = config["tag_mapping"]["outputs"]
+    batching = config.get("batching")
+    bindings = get_model_bindings(config)
+    metrics_server = metrics.configure(config.get("metrics"))
+    reconnect = config.get("reconnect", {})
+    session = SessionManager(
+        opcua_server_url,
+        watchdog_interval=reconnect.get("watchdog_interval", 1.0),
+        min_delay=reconnect.get("min_delay", 0.5),
+        max_delay=reconnect.get("max_delay", 10.0),
+    )
+    # Created once, the resolved NodeIds outlive the sessions.
+    resolver = NodeResolver(None, opcua_namespace, config.get("nodeid_cache_file"))
+
+    # The gRPC side does not depend on the OPC UA session and stays warm
+    # (channels and model metadata) while the bridge reconnects.
+    inference_clients = create_inference_clients(bindings, config.get("load_balancing"))
+    predictors: Dict[str, Union[AsyncInferenceClient, MicroBatcher]] = {}
+    for mlserver_grpc_url, inference_client in inference_clients.items():
+        predictors[mlserver_grpc_url] = inference_client
+        if batching:
+            predictors[mlserver_grpc_url] = MicroBatcher(
+                inference_client,
+                window=batching.get("window_ms", 5) / 1000,
+                max_batch_size=batching.get("max_batch_size", 32),
+            )
+    # Shadows mirror nothing until their candidate is warm, see Shadow.warm_up.
+    shadows: Dict[ModelBinding, Shadow] = {
+        binding: Shadow(
+            inference_clients[binding.mlserver_grpc_url],
+            **{"model_name": binding.model_name, **binding.shadow},
+            enabled=False,
+        )
+        for binding in bindings
+        if binding.shadow is not None
+    }
+    # Model switches per binding, they outlive the session that started them.
+    switches: Dict[ModelBinding, asyncio.Future] = {}
+    warmup_config = config.get("warmup", {})
+
+    async def predict(
+        binding: ModelBinding,
+        input_values: Optional[Dict],
+        write_after: Optional[asyncio.Event] = None,
+    ):
+        client = session.client
+        if client is None:
+            # predict is still set on the server, the resubscription of the
+            # next session triggers this prediction again.
+            logging.warning(f"No OPC UA session, prediction for '{binding.name}' deferred")
+            return
+        try:
+            await run_prediction(
+                client,
+                predictors[binding.mlserver_grpc_url],
+                binding,
+                input_values=input_values,
+                write_after=write_after,
+                shadow=shadows.get(binding),
+            )
+        except ua.uaerrors.BadNodeIdUnknown:
+            logging.warning("Mapped NodeIds are unknown, resolving them again")
+            metrics.RETRIES.inc("node_id_unknown")
+            resolver.invalidate()
+            with metrics.span("browse"):
+                await resolve_bindings(resolver, bindings)
+                await resolve_status_nodes(resolver, bindings)
+        except CONNECTION_ERRORS as e:
+            logging.warning(f"Prediction for '{binding.name}' lost with the session: {e!r}")
+        except (grpc.aio.AioRpcError, ua.UaStatusCodeError, ValueError, TypeError, KeyError) as e:
+            # A failing model or an output that does not fit its tag must not
+            # stop the bridge. The failure is counted in STAGE_ERRORS (total).
+            logging.error(f"Prediction for '{binding.name}' failed: {e!r}")
+            reset_predict(binding)
+
+    resets = set()
+
+    async def write_predict_reset(binding: ModelBinding):
+        try:
+            await binding.predict_obj.write_value(False)
+        except CONNECTION_ERRORS:
+            pass
+
+    def reset_predict(binding: ModelBinding):
+        # A dropped trigger must not leave predict set, or the next one
+        # would not be a data change.
+        task = asyncio.ensure_future(write_predict_reset(binding))
+        resets.add(task)
+        task.add_done_callback(resets.discard)
+
+    backpressure = config.get("backpressure", {})
+    watched = [
+        binding
+        for binding in bindings
+        if binding.trigger_mode in ("subscription", "continuous")
+    ]
+    queues: Dict[str, PredictionQueue] = {}
+    for binding in watched:
+        if binding.mlserver_grpc_url not in queues:
+            queues[binding.mlserver_grpc_url] = PredictionQueue(
+                predict,
+                max_size=backpressure.get("queue_size", 1000),
+                policy=backpressure.get("policy", "coalesce"),
+                max_in_flight=backpressure.get("max_in_flight", 16),
+                pipeline_depth=backpressure.get("pipeline_depth", 1),
+                on_drop=reset_predict,
+            )
 
-    logging.info(f"Connecting to {opcua_server_url} ...")
-    async with Client(url=opcua_server_url) as client:
+    async def serve(client: Client):
+        """Resolve the bindings on a new session and serve them until it drops."""
+        resolver.use_client(client)
         # Find the namespace index
-        nsidx = await client.get_namespace_index(opcua_namespace)
+        nsidx = await resolver.get_namespace_index()
         logging.info(f"Namespace Index for '{opcua_namespace}': {nsidx}")
 
-        input_values = {}
-
-        predict_obj = await client.nodes.root.get_child(
-            ["0:Objects", f"{nsidx}:{model_name}", f"{nsidx}:predict"]
-        )
-        predict = await predict_obj.read_value()
-
-        if predict:
-            logging.info("Predict is enabled continuing with prediction...")
-            for input in inputs:
-                input_obj = await client.nodes.root.get_child(
-                    ["0:Objects", f"{nsidx}:{model_name}", f"{nsidx}:{input['tag']}"]
+        with metrics.span("browse"):
+            await resolve_bindings(resolver, bindings)
+            await resolve_status_nodes(resolver, bindings)
+
+        # No trigger is taken before the models are warm.
+        if warming is not None:
+            if not warming.done():
+                await write_ready(client, bindings, False)
+            try:
+                await warming
+            except Exception as e:
+                # TimeoutError is also a connection error to the session
+                # manager, which would reconnect instead of failing.
+                raise RuntimeError(f"Warming up the models failed: {e!r}") from e
+            await write_ready(client, bindings, True)
+
+        serving = []
+        if watched:
+            serving.append(
+                write_status(
+                    client, queues, watched, backpressure.get("status_interval", 1.0)
                 )
-                input_val = await input_obj.read_value()
-                input_values[input["name"]] = input_val
-
-            output_values = call_model(mlserver_grpc_url, model_name, input_values)
-
-            for output in outputs:
-                output_obj = await client.nodes.root.get_child(
-                    ["0:Objects", f"{nsidx}:{model_name}", f"{nsidx}:{output['tag']}"]
+            )
+        for binding in bindings:
+            if binding in watched:
+                # Subscribing again replays the current predict value, so
+                # triggers set while disconnected are not lost.
+                serving.append(
+                    watch_binding(client, queues[binding.mlserver_grpc_url], binding)
                 )
-                await output_obj.write_value(output_values[output["name"]])
-            await predict_obj.write_value(False)
+                if "target_model" in binding.status_objs:
+                    serving.append(
+                        watch_model_target(
+                            client,
+                            inference_clients[binding.mlserver_grpc_url],
+                            binding,
+                            bindings,
+                            switches,
+                            warmup_config,
+                            config.get("rollout", {}).get("drain_timeout", 30.0),
+                        )
+                    )
+            else:
+                serving.append(
+                    predict_once(
+                        client,
+                        predictors[binding.mlserver_grpc_url],
+                        binding,
+                        shadow=shadows.get(binding),
+                    )
+                )
+        await asyncio.gather(*serving)
+
+    # Warming up runs while the OPC UA session is being set up. A one-shot
+    # run takes no triggers to protect, it skips it.
+    warming = None
+    if watched:
+        warming = asyncio.ensure_future(
+            warm_up_models(inference_clients, bindings, warmup_config)
+        )
+    # Candidates warm up on their own, a failing one never gates production.
+    shadow_warmups = [
+        asyncio.ensure_future(shadow.warm_up(binding.model_name, warmup_config))
+        for binding, shadow in shadows.items()
+    ]
+    logging.info(f"Connecting to {opcua_server_url} ...")
+    runs = [asyncio.ensure_future(queue.run()) for queue in queues.values()]
+    try:
+        if watched:
+            await asyncio.gather(session.run(serve), *runs)
         else:
-            logging.info("Predict is disabled skipping prediction...")
+            # A one-shot run fails fast when the server is down, whatever
+            # launches it runs it again later.
+            async with Client(url=opcua_server_url) as client:
+                await serve(client)
+    finally:
+        if warming is not None:
+            warming.cancel()
+        for shadow_warmup in shadow_warmups:
+            shadow_warmup.cancel()
+        for switch in switches.values():
+            switch.cancel()
+        for run in runs:
+            run.cancel()
+        for inference_client in inference_clients.values():
+            await inference_client.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional, Union
+
+from asyncua import Node, ua
+
+from node_resolver import NodeResolver
+
+# Status variables the bridge keeps up to date on a binding's object, if
+# present, and their types. `target_model` is written by operators instead,
+# to switch the binding to another model version.
+STATUS_TAGS = {
+    "queue_depth": ua.VariantType.Int64,
+    "dropped": ua.VariantType.Int64,
+    "ready": ua.VariantType.Boolean,
+    "active_model": ua.VariantType.String,
+    "target_model": ua.VariantType.String,
+    "model_error": ua.VariantType.String,
+}
+
+# Top-level config keys that act as defaults for every entry under `models`.
+BINDING_KEYS = (
+    "model_name",
+    "model_version",
+    "mlserver_grpc_url",
+    "tensor_encoding",
+    "trigger",
+    "tag_mapping",
+    "result_cache",
+    "shadow",
+)
+
+
+class ModelBinding:
+    """One model bound to one OPC UA object and its tag mapping.
+
+    ``object_path`` is the ``/`` separated path of the object below the
+    Objects folder and defaults to the model name. The mapped nodes are
+    filled in by ``resolve_bindings``.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        mlserver_grpc_url: Union[str, List[str]],
+        tag_mapping: Dict,
+        object_path: Optional[str] = None,
+        tensor_encoding: str = "contents",
+        trigger: Optional[Dict] = None,
+        result_cache: Optional[Dict] = None,
+        model_version: str = "",
+        shadow: Optional[Dict] = None,
+    ):
+        self.model_name = model_name
+        # Empty lets MLServer pick the version. Both change together on a switch.
+        self.model_version = str(model_version)
+        # Several endpoints are kept as one comma separated key, they share a client.
+        if not isinstance(mlserver_grpc_url, str):
+            mlserver_grpc_url = ",".join(mlserver_grpc_url)
+        self.mlserver_grpc_url = mlserver_grpc_url
+        self.object_path = (object_path or model_name).split("/")
+        self.inputs: List[Dict] = tag_mapping["inputs"]
+        self.outputs: List[Dict] = tag_mapping["outputs"]
+        self.tensor_encoding = tensor_encoding
+        self.trigger = trigger or {}
+        # Limits of the model's ResultCache, None leaves the model uncached.
+        self.result_cache = result_cache
+        # Candidate model mirrored a fraction of the traffic, see rollout.Shadow.
+        self.shadow = shadow
+
+        self.predict_obj: Optional[Node] = None
+        self.input_objs: Dict[str, Node] = {}
+        self.output_objs: Dict[str, Node] = {}
+        self.status_objs: Dict[str, Node] = {}
+
+    @property
+    def name(self) -> str:
+        return "/".join(self.object_path)
+
+    @property
+    def trigger_mode(self) -> str:
+        return self.trigger.get("mode", "once")
+
+    @property
+    def raw_encoding(self) -> bool:
+        return self.tensor_encoding == "raw"
+
+    def browse_paths(self, nsidx: int) -> List[List[str]]:
+        object_path = ["0:Objects", *(f"{nsidx}:{name}" for name in self.object_path)]
+        return [
+            [*object_path, f"{nsidx}:predict"],
+            *([*object_path, f"{nsidx}:{input['tag']}"] for input in self.inputs),
+            *([*object_path, f"{nsidx}:{output['tag']}"] for output in self.outputs),
+        ]
+
+    def status_paths(self, nsidx: int) -> List[List[str]]:
+        object_path = ["0:Objects", *(f"{nsidx}:{name}" for name in self.object_path)]
+        return [[*object_path, f"{nsidx}:{tag}"] for tag in STATUS_TAGS]
+
+    def set_nodes(self, nodes: List[Node]):
+        self.predict_obj, *nodes = nodes
+        self.input_objs = dict(
+            zip((input["name"] for input in self.inputs), nodes[: len(self.inputs)])
+        )
+        self.output_objs = dict(
+            zip((output["name"] for output in self.outputs), nodes[len(self.inputs) :])
+        )
+
+
+def get_model_bindings(config: Dict) -> List[ModelBinding]:
+    defaults = {key: config[key] for key in BINDING_KEYS if key in config}
+    return [
+        ModelBinding(**{**defaults, **model}) for model in config.get("models", [{}])
+    ]
+
+
+async def resolve_bindings(resolver: NodeResolver, bindings: List[ModelBinding]):
+    """Resolve the nodes of all bindings with a single batched translate call."""
+    nsidx = await resolver.get_namespace_index()
+    browse_paths = [binding.browse_paths(nsidx) for binding in bindings]
+    nodes = await resolver.resolve([path for paths in browse_paths for path in paths])
+    offset = 0
+    for binding, paths in zip(bindings, browse_paths):
+        binding.set_nodes(nodes[offset : offset + len(paths)])
+        offset += len(paths)
+
+
+async def resolve_status_nodes(resolver: NodeResolver, bindings: List[ModelBinding]):
+    """Resolve the status variables of all bindings, skipping objects without them."""
+    nsidx = await resolver.get_namespace_index()
+    nodes = await resolver.resolve(
+        [path for binding in bindings for path in binding.status_paths(nsidx)],
+        strict=False,
+    )
+    for i, binding in enumerate(bindings):
+        binding_nodes = nodes[i * len(STATUS_TAGS) : (i + 1) * len(STATUS_TAGS)]
+        binding.status_objs = {
+            tag: node for tag, node in zip(STATUS_TAGS, binding_nodes) if node is not None
+        }
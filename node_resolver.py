@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Set
+
+from asyncua import Client, Node, ua
+
+
+def browse_path_to_string(browse_path: List[str]) -> str:
+    return "/" + "/".join(browse_path)
+
+
+async def read_values(client: Client, nodes: List[Node]) -> List:
+    """Read the values of ``nodes`` in one Read call, raising on bad status."""
+    results = await client.read_attributes(nodes, ua.AttributeIds.Value)
+    for result in results:
+        result.StatusCode.check()
+    return [result.Value.Value for result in results]
+
+
+class NodeResolver:
+    """Resolves browse paths to Nodes with one TranslateBrowsePathsToNodeIds call.
+
+    Resolved NodeIds are kept in memory and, if ``cache_file`` is given,
+    persisted per server URL and namespace URI so a restarted process does
+    not have to browse again. The persisted entries are only reused while the
+    namespace keeps the same index on the server.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Client],
+        namespace_uri: str,
+        cache_file: Optional[str] = None,
+    ):
+        self.client = client
+        self.namespace_uri = namespace_uri
+        self.cache_file = cache_file
+        self.nsidx: Optional[int] = None
+        # Namespace index the resolved NodeIds belong to, kept across sessions.
+        self._node_ids_nsidx: Optional[int] = None
+        self._node_ids: Dict[str, str] = {}
+        # Entries loaded from the cache file that this session has not checked.
+        self._unverified: Set[str] = set()
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.client.server_url.geturl()}|{self.namespace_uri}"
+
+    async def get_namespace_index(self) -> int:
+        if self.nsidx is None:
+            self.nsidx = await self.client.get_namespace_index(self.namespace_uri)
+            if self._node_ids_nsidx not in (None, self.nsidx):
+                logging.info("Namespace index changed, resolving NodeIds again")
+                self._node_ids = {}
+                self._unverified = set()
+            self._node_ids_nsidx = self.nsidx
+            self._load()
+        return self.nsidx
+
+    def use_client(self, client: Client):
+        """Continue on a new session without browsing again.
+
+        The NodeIds resolved so far are kept, and checked with a single
+        NodeClass read before their next use.
+        """
+        self.client = client
+        self.nsidx = None
+        self._unverified = set(self._node_ids)
+
+    async def resolve(
+        self, browse_paths: List[List[str]], strict: bool = True
+    ) -> List[Optional[Node]]:
+        """Resolve ``browse_paths`` to Nodes, None for unknown paths unless ``strict``."""
+        await self.get_namespace_index()
+        path_strings = [browse_path_to_string(path) for path in browse_paths]
+        await self._verify([path for path in path_strings if path in self._unverified])
+        missing = [path for path in path_strings if path not in self._node_ids]
+        if missing:
+            logging.info(f"Translating {len(missing)} browse paths to NodeIds...")
+            results = await self.client.translate_browsepaths(
+                self.client.nodes.root.nodeid, missing
+            )
+            for path, result in zip(missing, results):
+                if strict:
+                    result.StatusCode.check()
+                elif not result.StatusCode.is_good():
+                    logging.debug(f"Browse path {path} not found")
+                    continue
+                self._node_ids[path] = result.Targets[0].TargetId.to_string()
+            self._save()
+        return [
+            self.client.get_node(self._node_ids[path]) if path in self._node_ids else None
+            for path in path_strings
+        ]
+
+    def invalidate(self):
+        """Forget every resolved NodeId, e.g. after a BadNodeIdUnknown."""
+        self.nsidx = None
+        self._node_ids = {}
+        self._unverified = set()
+        self._save()
+
+    async def _verify(self, paths: List[str]):
+        # One NodeClass read tells whether persisted NodeIds are still known.
+        if not paths:
+            return
+        results = await self.client.read_attributes(
+            [self.client.get_node(self._node_ids[path]) for path in paths],
+            ua.AttributeIds.NodeClass,
+        )
+        for path, result in zip(paths, results):
+            if result.StatusCode.value == ua.StatusCodes.BadNodeIdUnknown:
+                logging.info(f"Cached NodeId for {path} is unknown, resolving again")
+                del self._node_ids[path]
+            self._unverified.discard(path)
+
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        with open(self.cache_file, "r") as file:
+            entry = json.load(file).get(self.cache_key)
+        if entry and entry["nsidx"] == self.nsidx:
+            self._node_ids = entry["node_ids"]
+            self._unverified = set(self._node_ids)
+            logging.info(f"Loaded {len(self._node_ids)} cached NodeIds")
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        cache = {}
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file, "r") as file:
+                cache = json.load(file)
+        if self._node_ids:
+            cache[self.cache_key] = {"nsidx": self.nsidx, "node_ids": self._node_ids}
+        else:
+            cache.pop(self.cache_key, None)
+        with open(self.cache_file, "w") as file:
+            json.dump(cache, file, indent=2)
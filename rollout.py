@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from inference_client import AsyncInferenceClient, ResultCache
+from model_bindings import ModelBinding
+
+
+def parse_model_target(value: str, model_name: str) -> Tuple[str, str]:
+    """``name:version``, ``name`` or ``:version`` (of ``model_name``) as (name, version)."""
+    name, _, version = value.strip().partition(":")
+    return name or model_name, version
+
+
+def format_model_target(model_name: str, model_version: str) -> str:
+    return f"{model_name}:{model_version}" if model_version else model_name
+
+
+def output_difference(primary: Dict, candidate: Dict) -> float:
+    """Largest absolute difference between two predictions, inf if they cannot be compared."""
+    difference = 0.0
+    for name, value in primary.items():
+        if name not in candidate:
+            return math.inf
+        try:
+            primary_array = np.asarray(value, dtype=np.float64)
+            candidate_array = np.asarray(candidate[name], dtype=np.float64)
+        except (TypeError, ValueError):
+            # BYTES outputs only match or do not.
+            if list(value) != list(candidate[name]):
+                return math.inf
+            continue
+        if primary_array.shape != candidate_array.shape:
+            return math.inf
+        if primary_array.size:
+            difference = max(
+                difference, float(np.max(np.abs(primary_array - candidate_array)))
+            )
+    return difference
+
+
+async def switch_model(
+    inference_client: AsyncInferenceClient,
+    binding: ModelBinding,
+    bindings: List[ModelBinding],
+    model_name: str,
+    model_version: str = "",
+    warmup_config: Optional[Dict] = None,
+    drain_timeout: float = 30.0,
+):
+    """Move ``binding`` to another model version without dropping a prediction.
+
+    The new model is loaded on every endpoint, polled until ready and warmed
+    up while the old one keeps serving. The binding is then flipped in one
+    step, so each prediction uses either version entirely, and once the
+    predictions still running on the old version are drained, the old model
+    is unloaded if no other binding uses it. RepositoryModelUnload has no
+    version, so a switch between two versions of one model name never
+    unloads: that would unload the new version as well.
+    """
+    warmup_config = warmup_config or {}
+    old_name, old_version = binding.model_name, binding.model_version
+    if (old_name, old_version) == (model_name, model_version):
+        return
+    # The client keys these opt-ins on the model name, they follow the binding.
+    if binding.raw_encoding:
+        inference_client.raw_encoding_models.add(model_name)
+    if binding.result_cache is not None and model_name not in inference_client.result_caches:
+        inference_client.result_caches[model_name] = ResultCache(**binding.result_cache)
+    logging.info(
+        f"Switching '{binding.name}' from {format_model_target(old_name, old_version)}"
+        f" to {format_model_target(model_name, model_version)}..."
+    )
+    with metrics.span("switch", old_name):
+        await inference_client.load_model(model_name)
+        await inference_client.wait_until_ready(
+            model_name,
+            timeout=warmup_config.get("ready_timeout"),
+            interval=warmup_config.get("poll_interval", 1.0),
+            model_version=model_version,
+        )
+        await inference_client.warm_up(
+            model_name, requests=warmup_config.get("requests", 1), model_version=model_version
+        )
+        binding.model_name, binding.model_version = model_name, model_version
+        users = [
+            other
+            for other in bindings
+            if other.model_name == old_name
+            and other.mlserver_grpc_url == binding.mlserver_grpc_url
+        ]
+        # Other bindings still predicting with the old version would never let it drain.
+        if not any(other.model_version == old_version for other in users):
+            await inference_client.drain(old_name, old_version, timeout=drain_timeout)
+            if old_name != model_name and not users:
+                await inference_client.unload_model(old_name)
+    logging.info(f"'{binding.name}' now uses {format_model_target(model_name, model_version)}")
+
+
+class Shadow:
+    """Mirrors a sampled ``fraction`` of a binding's predictions to a candidate model.
+
+    The candidate's outputs never reach OPC UA. Its latency next to the
+    production one, and the largest difference of its outputs, are recorded
+    in the shadow metrics; differences above ``tolerance`` count as
+    mismatches. At most ``max_in_flight`` mirrored requests run at once,
+    samples beyond that are skipped rather than slowing down production.
+    Nothing is mirrored while ``enabled`` is False, e.g. until ``warm_up``
+    has loaded the candidate.
+    """
+
+    def __init__(
+        self,
+        inference_client: AsyncInferenceClient,
+        model_name: str,
+        model_version: str = "",
+        fraction: float = 0.1,
+        tolerance: float = 0.0,
+        max_in_flight: int = 8,
+        enabled: bool = True,
+    ):
+        self.inference_client = inference_client
+        self.model_name = model_name
+        self.model_version = str(model_version)
+        self.fraction = fraction
+        self.tolerance = tolerance
+        self.max_in_flight = max_in_flight
+        self.enabled = enabled
+        self.compared = 0
+        self.mismatches = 0
+        self._tasks = set()
+
+    async def warm_up(self, production_model: str, warmup_config: Optional[Dict] = None):
+        """Load, wait for and warm up the candidate, then enable mirroring.
+
+        A candidate that fails is logged, counted as ``unavailable`` and
+        stays disabled, production never waits for it.
+        """
+        warmup_config = warmup_config or {}
+        try:
+            await self.inference_client.load_model(self.model_name)
+            await self.inference_client.wait_until_ready(
+                self.model_name,
+                timeout=warmup_config.get("ready_timeout"),
+                interval=warmup_config.get("poll_interval", 1.0),
+                model_version=self.model_version,
+            )
+            await self.inference_client.warm_up(
+                self.model_name,
+                requests=warmup_config.get("requests", 1),
+                model_version=self.model_version,
+            )
+        except Exception as e:
+            logging.error(
+                f"Shadow {format_model_target(self.model_name, self.model_version)} of"
+                f" {production_model} is unavailable, not mirroring: {e!r}"
+            )
+            metrics.SHADOW_RESULTS.inc(production_model, "unavailable")
+            self.enabled = False
+            return
+        self.enabled = True
+
+    def mirror(
+        self, binding: ModelBinding, input_values: Dict, output_values: Dict, latency: float
+    ):
+        if not self.enabled or random.random() >= self.fraction:
+            return
+        if len(self._tasks) >= self.max_in_flight:
+            metrics.SHADOW_RESULTS.inc(binding.model_name, "skipped")
+            return
+        task = asyncio.ensure_future(
+            self._compare(binding.model_name, input_values, output_values, latency)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compare(
+        self, model_name: str, input_values: Dict, output_values: Dict, latency: float
+    ):
+        start = time.perf_counter()
+        try:
+            shadow_values = await self.inference_client.infer(
+                self.model_name, input_values, self.model_version
+            )
+        except Exception as e:
+            logging.warning(f"Shadow prediction of {self.model_name} failed: {e!r}")
+            metrics.SHADOW_RESULTS.inc(model_name, "error")
+            return
+        shadow_latency = time.perf_counter() - start
+        difference = output_difference(output_values, shadow_values)
+        self.compared += 1
+        metrics.SHADOW_SECONDS.observe(latency, model_name, "production")
+        metrics.SHADOW_SECONDS.observe(shadow_latency, model_name, "shadow")
+        metrics.SHADOW_DIFFERENCE.observe(difference, model_name)
+        if difference > self.tolerance:
+            self.mismatches += 1
+            metrics.SHADOW_RESULTS.inc(model_name, "mismatch")
+            logging.info(
+                f"Shadow {format_model_target(self.model_name, self.model_version)} differs"
+                f" from {model_name} by {difference}: {shadow_values} vs {output_values}"
+            )
+        else:
+            metrics.SHADOW_RESULTS.inc(model_name, "match")
@@ -1,10 +1,19 @@
 import asyncio
 import logging
 import random
-from typing import Dict
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
 
 import yaml
-from asyncua import Node, Server
+from asyncua import Node, Server, ua
+from asyncua.server.history import SubHandler as HistorySubHandler
+
+from inference_client import AsyncInferenceClient
+from mlserver_grpc import create_inference_clients, to_opcua_value
+from model_bindings import STATUS_TAGS, ModelBinding, get_model_bindings
+from simulation import build_simulated_address_space
 
 
 def load_config():
@@ -13,13 +22,217 @@ def load_config():
     return config
 
 
+class ChangeLog:
+    """Server-side data-change handler keeping recent value changes.
+
+    The last ``size`` changes are kept in a ring buffer and at most ``rate``
+    of them are logged per second, the rest are only counted.
+    """
+
+    def __init__(self, names: Dict[Node, str], size: int = 1000, rate: int = 10):
+        self.names = names
+        self.changes = deque(maxlen=size)
+        self.rate = rate
+        self._logger = logging.getLogger(__name__)
+        self._window_start = 0.0
+        self._logged = 0
+        self._suppressed = 0
+
+    def datachange_notification(self, node: Node, val, data):
+        name = self.names.get(node, str(node))
+        self.changes.append((time.time(), name, val))
+
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            if self._suppressed:
+                self._logger.info(f"{self._suppressed} more value changes not logged")
+            self._window_start = now
+            self._logged = 0
+            self._suppressed = 0
+        if self._logged < self.rate:
+            self._logger.info(f"{name} has value {val}")
+            self._logged += 1
+        else:
+            self._suppressed += 1
+
+
+class InProcessPredictor:
+    """Runs a binding's predictions inside the server, without a bridge hop.
+
+    Inputs are read from and outputs written to the local address space with
+    no awaits on the network in between, so no client observes a partially
+    written set of outputs. Used by the ``Predict`` method and the
+    ``predict`` write hook.
+    """
+
+    def __init__(
+        self,
+        server: Server,
+        binding: ModelBinding,
+        nodes: Dict[str, Node],
+        inference_client: AsyncInferenceClient,
+    ):
+        self.server = server
+        self.binding = binding
+        self.nodes = nodes
+        self.inference_client = inference_client
+        self.output_types: Dict[str, ua.VariantType] = {}
+        self.running = False
+        # A trigger arrived during the running prediction, which read its inputs already.
+        self.pending = False
+
+    async def init(self):
+        for output in self.binding.outputs:
+            self.output_types[output["name"]] = await self.nodes[
+                output["tag"]
+            ].read_data_type_as_variant_type()
+
+    async def predict(self) -> Dict:
+        input_values = {}
+        for input in self.binding.inputs:
+            input_values[input["name"]] = await self.nodes[input["tag"]].read_value()
+
+        output_values = await self.inference_client.infer(
+            self.binding.model_name, input_values, self.binding.model_version
+        )
+
+        for output in self.binding.outputs:
+            await self.server.write_attribute_value(
+                self.nodes[output["tag"]].nodeid,
+                ua.DataValue(self.output_variant(output["name"], output_values)),
+            )
+        await self.server.write_attribute_value(
+            self.nodes["predict"].nodeid, ua.DataValue(ua.Variant(False))
+        )
+        return output_values
+
+    def output_variant(self, name: str, output_values: Dict) -> ua.Variant:
+        return ua.Variant(to_opcua_value(output_values[name]), self.output_types[name])
+
+    async def predict_method(self, parent: ua.NodeId) -> List[ua.Variant]:
+        output_values = await self.predict()
+        return [
+            self.output_variant(output["name"], output_values)
+            for output in self.binding.outputs
+        ]
+
+    async def predict_from_hook(self):
+        self.running = True
+        try:
+            # Triggers arriving meanwhile are folded into one more run.
+            while True:
+                self.pending = False
+                try:
+                    await self.predict()
+                except Exception:
+                    logging.getLogger(__name__).exception(
+                        f"In-process prediction for '{self.binding.name}' failed"
+                    )
+                if not self.pending:
+                    break
+        finally:
+            self.running = False
+
+
+class PredictHook:
+    """Starts an in-process prediction whenever a ``predict`` node is set."""
+
+    def __init__(self, predictors: Dict[Node, InProcessPredictor]):
+        self.predictors = predictors
+        self._tasks = set()
+
+    def datachange_notification(self, node: Node, val, data):
+        predictor = self.predictors[node]
+        if not val:
+            return
+        if predictor.running:
+            # Predicted again with the newer inputs once the running one is done.
+            predictor.pending = True
+        else:
+            task = asyncio.ensure_future(predictor.predict_from_hook())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+
+async def add_binding_object(server: Server, idx: int, objects: Dict, binding: ModelBinding):
+    # Parent objects are shared between bindings below the same path.
+    parent = server.nodes.objects
+    for depth in range(1, len(binding.object_path) + 1):
+        path = tuple(binding.object_path[:depth])
+        if path not in objects:
+            objects[path] = await parent.add_object(idx, path[-1])
+        parent = objects[path]
+    return parent
+
+
+async def historize(
+    server: Server,
+    bindings: List[ModelBinding],
+    binding_nodes: Dict[str, Dict[str, Node]],
+    history_config: Dict,
+):
+    """Keep history of every mapped tag, seeding the inputs with past samples.
+
+    ``seed_samples`` random input values spaced ``seed_interval`` seconds and
+    ending now are stored directly in the history, which gives the backfill
+    mode something to read without waiting for live data.
+    """
+    if history_config.get("db"):
+        from asyncua.server.history_sql import HistorySQLite
+
+        await server.iserver.history_manager.set_storage(
+            HistorySQLite(history_config["db"])
+        )
+    storage = server.iserver.history_manager.storage
+    historized = []
+    for binding in bindings:
+        nodes = binding_nodes[binding.name]
+        tags = [input["tag"] for input in binding.inputs]
+        tags += [output["tag"] for output in binding.outputs]
+        historized += [nodes[tag] for tag in tags]
+    for node in historized:
+        await storage.new_historized_node(node.nodeid, None, history_config.get("count", 0))
+    # Unlike historize_node_data_change, every value written between two
+    # publishes is queued, and a rewrite of the same value with a new source
+    # timestamp counts as a change, so a batch of backfilled outputs is kept whole.
+    # subscribe_data_change takes no filter, hence the lower level _subscribe.
+    data_change_filter = ua.DataChangeFilter()
+    data_change_filter.Trigger = ua.DataChangeTrigger.StatusValueTimestamp
+    subscription = await server.create_subscription(10, HistorySubHandler(storage))
+    await subscription._subscribe(
+        historized,
+        mfilter=data_change_filter,
+        queuesize=history_config.get("queue_size", 65535),
+    )
+
+    samples = history_config.get("seed_samples", 0)
+    interval = timedelta(seconds=history_config.get("seed_interval", 1.0))
+    start = datetime.now(timezone.utc) - samples * interval
+    for binding in bindings:
+        nodes = binding_nodes[binding.name]
+        for input in binding.inputs:
+            node_id = nodes[input["tag"]].nodeid
+            for i in range(samples):
+                timestamp = start + i * interval
+                await storage.save_node_value(
+                    node_id,
+                    ua.DataValue(
+                        ua.Variant(random.randint(1, 9), ua.VariantType.Int64),
+                        SourceTimestamp=timestamp,
+                        ServerTimestamp=timestamp,
+                    ),
+                )
+    if samples:
+        logging.getLogger(__name__).info(
+            f"Seeded {samples} historical samples per input tag"
+        )
+
+
 async def main(config):
     opcua_server_url = config["opcua_server_url"]
     opcua_namespace = config["opcua_namespace"]
-    model_name = config["model_name"]
-    mlserver_grpc_url = config["mlserver_grpc_url"]
-    inputs = config["tag_mapping"]["inputs"]
-    outputs = config["tag_mapping"]["outputs"]
+    server_config = config.get("server", {})
+    bindings = get_model_bindings(config)
 
     _logger = logging.getLogger(__name__)
     # setup our server
@@ -34,43 +247,112 @@ async def main(config):
     # populating our address space
     # server.nodes, contains links to very common nodes like objects and root
 
-    ml_object = await server.nodes.objects.add_object(idx, model_name)
+    objects: Dict = {}
+    binding_nodes: Dict[str, Dict[str, Node]] = {}
 
-    predict = await ml_object.add_variable(idx, "predict", True)
-    await predict.set_writable()
+    for binding in bindings:
+        ml_object = await add_binding_object(server, idx, objects, binding)
 
-    input_objects: Dict[str, Node] = {}
-    output_objects: Dict[str, Node] = {}
+        predict = await ml_object.add_variable(idx, "predict", True)
+        await predict.set_writable()
+        nodes: Dict[str, Node] = {"predict": predict}
 
-    for input in inputs:
-        input_obj = await ml_object.add_variable(
-            idx, input["tag"], random.randint(1, 9)
-        )
-        await input_obj.set_writable()
-        input_objects[input["tag"]] = input_obj
+        for input in binding.inputs:
+            input_obj = await ml_object.add_variable(
+                idx, input["tag"], random.randint(1, 9)
+            )
+            await input_obj.set_writable()
+            nodes[input["tag"]] = input_obj
+
+        for output in binding.outputs:
+            output_obj = await ml_object.add_variable(idx, output["tag"], 0)
+            await output_obj.set_writable()
+            nodes[output["tag"]] = output_obj
+
+        # Bridge readiness and backpressure status, written by the bridge.
+        for tag, varianttype in STATUS_TAGS.items():
+            initial = {ua.VariantType.Boolean: False, ua.VariantType.String: ""}.get(
+                varianttype, 0
+            )
+            status_obj = await ml_object.add_variable(idx, tag, initial, varianttype=varianttype)
+            await status_obj.set_writable()
 
-    for output in outputs:
-        output_obj = await ml_object.add_variable(idx, output["tag"], 0)
-        await output_obj.set_writable()
-        output_objects[output["tag"]] = output_obj
+        binding_nodes[binding.name] = nodes
+
+    names = {
+        node: f"{binding_name}: {tag}"
+        for binding_name, nodes in binding_nodes.items()
+        for tag, node in nodes.items()
+    }
+    change_log = ChangeLog(
+        names,
+        size=server_config.get("change_log_size", 1000),
+        rate=server_config.get("change_log_rate", 10),
+    )
+
+    inference_clients: Dict[str, AsyncInferenceClient] = {}
+    predictors: Dict[Node, InProcessPredictor] = {}
+    predict_method = server_config.get("predict_method", False)
+    predict_hook = server_config.get("predict_hook", False)
+    if predict_method or predict_hook:
+        inference_clients = create_inference_clients(bindings, config.get("load_balancing"))
+        for binding in bindings:
+            nodes = binding_nodes[binding.name]
+            predictor = InProcessPredictor(
+                server, binding, nodes, inference_clients[binding.mlserver_grpc_url]
+            )
+            await predictor.init()
+            predictors[nodes["predict"]] = predictor
+            if predict_method:
+                ml_object = objects[tuple(binding.object_path)]
+                await ml_object.add_method(
+                    idx,
+                    "Predict",
+                    predictor.predict_method,
+                    [],
+                    [predictor.output_types[output["name"]] for output in binding.outputs],
+                )
+
+    signal_groups = []
+    if "simulation" in config:
+        signal_groups = await build_simulated_address_space(
+            server, idx, config["simulation"]
+        )
 
     _logger.info("Starting server!")
     async with server:
-        while True:
-            await asyncio.sleep(1)
-            _logger.info("----START-LOOP---")
-            for input in inputs:
-                input_val = await input_objects[input["tag"]].get_value()
-                _logger.info(f"Input: {input['tag']} has value {input_val}")
-            for output in outputs:
-                output_val = await output_objects[output["tag"]].get_value()
-                _logger.info(f"Output: {output['tag']} has value {output_val}")
-            predict_val = await predict.get_value()
-            _logger.info(f"Predict has value {predict_val}")
-            _logger.info("----END-LOOP---")
+        signal_tasks = [
+            asyncio.ensure_future(group.run(server)) for group in signal_groups
+        ]
+        # Only changed values are reported, nothing polls the nodes.
+        subscription = await server.create_subscription(
+            server_config.get("publishing_interval", 500), change_log
+        )
+        await subscription.subscribe_data_change(list(names))
+        if "history" in server_config:
+            await historize(server, bindings, binding_nodes, server_config["history"])
+        if predict_hook:
+            hook_subscription = await server.create_subscription(
+                0, PredictHook(predictors)
+            )
+            # Setting predict again while it is still set changes only the
+            # timestamp, which must trigger too.
+            await hook_subscription._subscribe(
+                list(predictors),
+                mfilter=ua.DataChangeFilter(Trigger=ua.DataChangeTrigger.StatusValueTimestamp),
+            )
+        try:
+            await asyncio.Future()
+        finally:
+            for task in signal_tasks:
+                task.cancel()
+            for inference_client in inference_clients.values():
+                await inference_client.close()
 
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
     config = load_config()
-    asyncio.run(main(config), debug=True)
+    # Debug mode (asyncio debug + DEBUG logging) is costly, keep it off in production.
+    debug = config.get("server", {}).get("debug", False)
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    asyncio.run(main(config), debug=debug)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from asyncua import Client, ua
+
+import metrics
+
+# Errors that mean the OPC UA session is gone rather than that a request failed.
+CONNECTION_ERRORS = (
+    ConnectionError,
+    OSError,
+    asyncio.TimeoutError,
+    ua.uaerrors.BadSessionIdInvalid,
+    ua.uaerrors.BadSessionClosed,
+    ua.uaerrors.BadSecureChannelIdInvalid,
+    ua.uaerrors.BadSecureChannelClosed,
+    ua.uaerrors.BadConnectionClosed,
+    ua.uaerrors.BadServerNotConnected,
+    ua.uaerrors.BadNotConnected,
+    ua.uaerrors.BadCommunicationError,
+)
+
+
+class SessionManager:
+    """Keeps an OPC UA session to ``url`` up and runs ``serve`` on each one.
+
+    A watchdog reads the server state every ``watchdog_interval`` seconds.
+    When it or ``serve`` hits a connection error, ``serve`` is cancelled and
+    the manager reconnects with an exponential backoff from ``min_delay`` to
+    ``max_delay`` seconds, then starts ``serve`` again on the new session.
+    ``run`` returns once ``serve`` returns.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        watchdog_interval: float = 1.0,
+        min_delay: float = 0.5,
+        max_delay: float = 10.0,
+    ):
+        self.url = url
+        self.watchdog_interval = watchdog_interval
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.client: Optional[Client] = None
+        self.reconnects = 0
+        # Seconds from losing the session to serving again on a new one.
+        self.last_recovery: Optional[float] = None
+
+    async def run(self, serve: Callable[[Client], Awaitable]):
+        delay = self.min_delay
+        lost_at = None
+        while True:
+            client = Client(url=self.url)
+            try:
+                await client.connect()
+            except CONNECTION_ERRORS as e:
+                logging.warning(f"Could not connect to {self.url}: {e!r}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+                continue
+
+            delay = self.min_delay
+            self.client = client
+            if lost_at is not None:
+                self.reconnects += 1
+                self.last_recovery = time.monotonic() - lost_at
+                metrics.RETRIES.inc("reconnect")
+                logging.info(
+                    f"Reconnected to {self.url} {self.last_recovery:.2f}s after losing the session"
+                )
+            try:
+                return await self._serve(client, serve)
+            except CONNECTION_ERRORS as e:
+                lost_at = time.monotonic()
+                logging.warning(f"Lost the OPC UA session to {self.url}: {e!r}, reconnecting")
+            finally:
+                self.client = None
+                await self._disconnect(client)
+
+    async def _serve(self, client: Client, serve: Callable[[Client], Awaitable]):
+        serving = asyncio.ensure_future(serve(client))
+        watchdog = asyncio.ensure_future(self._watchdog(client))
+        try:
+            await asyncio.wait({serving, watchdog}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (serving, watchdog):
+                task.cancel()
+            await asyncio.gather(serving, watchdog, return_exceptions=True)
+        if watchdog.done() and not watchdog.cancelled() and watchdog.exception():
+            raise watchdog.exception()
+        return serving.result()
+
+    async def _watchdog(self, client: Client):
+        while True:
+            await asyncio.sleep(self.watchdog_interval)
+            await client.nodes.server_state.read_value()
+
+    async def _disconnect(self, client: Client):
+        try:
+            await asyncio.wait_for(client.disconnect(), timeout=2.0)
+        except Exception:
+            # The session is usually already gone, there is nothing to close.
+            pass
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import resource
+import time
+from typing import Dict, List
+
+import numpy as np
+from asyncua import Server, ua
+
+# OPC UA datatypes a simulated variable can have, with their NumPy dtype.
+DATATYPES = {
+    "Boolean": (ua.VariantType.Boolean, np.bool_),
+    "Int32": (ua.VariantType.Int32, np.int32),
+    "Int64": (ua.VariantType.Int64, np.int64),
+    "Float": (ua.VariantType.Float, np.float32),
+    "Double": (ua.VariantType.Double, np.float64),
+}
+
+# Nodes are added with one AddNodes call per chunk instead of one per node.
+ADD_NODES_CHUNK = 5000
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SignalGroup:
+    """One `variables` entry of the simulation spec across all objects.
+
+    Values for every node of the group are generated as one NumPy array of
+    shape ``(nodes, length)`` and written with a single Write call.
+    """
+
+    def __init__(self, spec: Dict, node_ids: List[ua.NodeId], seed: int = 0):
+        self.name = spec["name"]
+        self.variant_type, self.dtype = DATATYPES[spec.get("datatype", "Double")]
+        self.length = spec.get("length", 0)
+        self.signal = spec.get("signal", "sine")
+        self.update_rate = spec.get("update_rate", 1.0)
+        self.amplitude = spec.get("amplitude", 1.0)
+        self.offset = spec.get("offset", 0.0)
+        self.frequency = spec.get("frequency", 0.1)
+        self.node_ids = node_ids
+
+        rng = np.random.default_rng(seed)
+        self._rng = rng
+        shape = (len(node_ids), max(1, self.length))
+        self._phase = rng.uniform(0, 2 * np.pi, size=shape)
+
+    def values(self, t: float) -> np.ndarray:
+        if self.signal == "random":
+            values = self._rng.normal(self.offset, self.amplitude, size=self._phase.shape)
+        elif self.signal == "ramp":
+            values = self.offset + (
+                (t * self.frequency + self._phase / (2 * np.pi)) % 1.0
+            ) * self.amplitude
+        else:
+            values = self.offset + self.amplitude * np.sin(
+                2 * np.pi * self.frequency * t + self._phase
+            )
+        if self.dtype is np.bool_:
+            return values > self.offset
+        return values.astype(self.dtype)
+
+    def initial_variants(self) -> List[ua.Variant]:
+        return self.variants(self.values(0.0))
+
+    def variants(self, values: np.ndarray) -> List[ua.Variant]:
+        rows = values.tolist()
+        if self.length:
+            return [ua.Variant(row, self.variant_type) for row in rows]
+        return [ua.Variant(row[0], self.variant_type) for row in rows]
+
+    async def write(self, server: Server, t: float):
+        params = ua.WriteParameters()
+        for node_id, variant in zip(self.node_ids, self.variants(self.values(t))):
+            write_value = ua.WriteValue()
+            write_value.NodeId = node_id
+            write_value.AttributeId = ua.AttributeIds.Value
+            write_value.Value = ua.DataValue(variant)
+            params.NodesToWrite.append(write_value)
+        await server.iserver.isession.write(params)
+
+    async def run(self, server: Server):
+        period = 1.0 / self.update_rate
+        start = time.monotonic()
+        while True:
+            await asyncio.sleep(period - (time.monotonic() - start) % period)
+            await self.write(server, time.monotonic() - start)
+
+
+def object_item(idx: int, parent: ua.NodeId, name: str, node_id: str) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(node_id, idx)
+    item.BrowseName = ua.QualifiedName(name, idx)
+    item.NodeClass = ua.NodeClass.Object
+    item.ParentNodeId = parent
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.Organizes)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseObjectType)
+    attrs = ua.ObjectAttributes()
+    attrs.DisplayName = ua.LocalizedText(name)
+    attrs.Description = ua.LocalizedText(name)
+    attrs.EventNotifier = 0
+    attrs.WriteMask = 0
+    attrs.UserWriteMask = 0
+    item.NodeAttributes = attrs
+    return item
+
+
+def variable_item(
+    idx: int, parent: ua.NodeId, name: str, node_id: str, variant: ua.Variant
+) -> ua.AddNodesItem:
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(node_id, idx)
+    item.BrowseName = ua.QualifiedName(name, idx)
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = parent
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.DisplayName = ua.LocalizedText(name)
+    attrs.Description = ua.LocalizedText(name)
+    attrs.DataType = ua.NodeId(getattr(ua.ObjectIds, variant.VariantType.name))
+    attrs.Value = variant
+    if isinstance(variant.Value, list):
+        attrs.ValueRank = ua.ValueRank.OneDimension
+        attrs.ArrayDimensions = [len(variant.Value)]
+    else:
+        attrs.ValueRank = ua.ValueRank.Scalar
+    attrs.WriteMask = 0
+    attrs.UserWriteMask = 0
+    attrs.Historizing = False
+    attrs.AccessLevel = ua.AccessLevel.CurrentRead.mask
+    attrs.UserAccessLevel = ua.AccessLevel.CurrentRead.mask
+    item.NodeAttributes = attrs
+    return item
+
+
+async def add_nodes(server: Server, items: List[ua.AddNodesItem]):
+    for start in range(0, len(items), ADD_NODES_CHUNK):
+        results = await server.iserver.isession.add_nodes(
+            items[start : start + ADD_NODES_CHUNK]
+        )
+        for result in results:
+            result.StatusCode.check()
+
+
+async def build_simulated_address_space(
+    server: Server, idx: int, spec: Dict
+) -> List[SignalGroup]:
+    """Build ``spec["objects"]`` objects with the spec's variables below a folder.
+
+    Each ``variables`` entry adds ``count`` variables named ``<name>_<i>`` to
+    every object (scalars, or arrays of ``length`` elements).
+    """
+    start = time.perf_counter()
+    rss_before = max_rss_mb()
+
+    folder_name = spec.get("folder", "Simulation")
+    prefix = spec.get("object_prefix", "Machine")
+    object_count = spec.get("objects", 100)
+    variable_specs = spec.get("variables", [])
+
+    folder = await server.nodes.objects.add_folder(idx, folder_name)
+    object_names = [f"{prefix}{i:05d}" for i in range(object_count)]
+    object_ids = {
+        name: ua.NodeId(f"{folder_name}.{name}", idx) for name in object_names
+    }
+    await add_nodes(
+        server,
+        [
+            object_item(idx, folder.nodeid, name, object_ids[name].Identifier)
+            for name in object_names
+        ],
+    )
+
+    groups = []
+    items = []
+    for seed, variable_spec in enumerate(variable_specs):
+        names = [
+            f"{variable_spec['name']}_{i}" for i in range(variable_spec.get("count", 1))
+        ]
+        node_ids = [
+            f"{folder_name}.{object_name}.{name}"
+            for object_name in object_names
+            for name in names
+        ]
+        group = SignalGroup(
+            variable_spec, [ua.NodeId(node_id, idx) for node_id in node_ids], seed=seed
+        )
+        variants = iter(group.initial_variants())
+        for object_name in object_names:
+            for name in names:
+                items.append(
+                    variable_item(
+                        idx,
+                        object_ids[object_name],
+                        name,
+                        f"{folder_name}.{object_name}.{name}",
+                        next(variants),
+                    )
+                )
+        groups.append(group)
+    await add_nodes(server, items)
+
+    logging.getLogger(__name__).info(
+        f"Built simulated address space with {object_count} objects and "
+        f"{len(items)} variables in {time.perf_counter() - start:.2f}s, "
+        f"max RSS grew by {max_rss_mb() - rss_before:.1f} MB"
+    )
+    return groups
@@ -0,0 +1,326 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import dataplane_pb2
+
+# Little-endian NumPy dtypes of the KServe V2 datatypes that can be sent as
+# raw_input_contents / raw_output_contents. BYTES is length-prefixed instead.
+RAW_DTYPES = {
+    "BOOL": np.dtype("?"),
+    "UINT8": np.dtype("<u1"),
+    "UINT16": np.dtype("<u2"),
+    "UINT32": np.dtype("<u4"),
+    "UINT64": np.dtype("<u8"),
+    "INT8": np.dtype("<i1"),
+    "INT16": np.dtype("<i2"),
+    "INT32": np.dtype("<i4"),
+    "INT64": np.dtype("<i8"),
+    "FP16": np.dtype("<f2"),
+    "FP32": np.dtype("<f4"),
+    "FP64": np.dtype("<f8"),
+}
+
+# InferTensorContents field holding each KServe V2 datatype. There is no
+# 16-bit float field, FP16 values travel (losslessly widened) as FP32.
+CONTENTS_FIELDS = {
+    "BOOL": "bool_contents",
+    "UINT8": "uint_contents",
+    "UINT16": "uint_contents",
+    "UINT32": "uint_contents",
+    "UINT64": "uint64_contents",
+    "INT8": "int_contents",
+    "INT16": "int_contents",
+    "INT32": "int_contents",
+    "INT64": "int64_contents",
+    "FP16": "fp32_contents",
+    "FP32": "fp32_contents",
+    "FP64": "fp64_contents",
+    "BYTES": "bytes_contents",
+}
+
+
+def as_sequence(value):
+    if isinstance(value, (bytes, str)) or not hasattr(value, "__iter__"):
+        return [value]
+    return value
+
+
+def as_contents_values(datatype: str, value):
+    """``value`` as a sequence the InferTensorContents field of ``datatype`` accepts.
+
+    NumPy values, such as the float64 windows of subscribed inputs, are cast
+    to the tensor's dtype first: protobuf rejects a float for an integer field.
+    """
+    if isinstance(value, (np.ndarray, np.generic)) and datatype in RAW_DTYPES:
+        return np.asarray(value, dtype=RAW_DTYPES[datatype]).reshape(-1).tolist()
+    return as_sequence(value)
+
+
+# The uncompiled encode/decode path, kept as the cold-call baseline of
+# benchmark.cold_call. Predictions go through TensorCodec.
+
+
+def generate_infer_inputs(
+    inputs_metadata: List[dataplane_pb2.ModelMetadataResponse.TensorMetadata],
+    inputs_values: Dict,
+):
+    input_iterable: List[dataplane_pb2.ModelInferRequest.InferInputTensor] = []
+
+    for input in inputs_metadata:
+        input_value = as_contents_values(input.datatype, inputs_values[input.name])
+        input_tensor_contents = insert_value_into_tensor_content(
+            datatype=input.datatype, input_value=input_value
+        )
+
+        input_iterable.append(
+            dataplane_pb2.ModelInferRequest.InferInputTensor(
+                name=input.name,
+                datatype=input.datatype,
+                shape=input.shape,
+                parameters=input.parameters,
+                contents=input_tensor_contents,
+            )
+        )
+    return input_iterable
+
+
+def parse_output_values(
+    model_infer_outputs: List[dataplane_pb2.ModelInferResponse.InferOutputTensor],
+) -> Dict:
+    output_values = {}
+    for infer_output in model_infer_outputs:
+        output_value = extract_value_from_tensor_content(
+            datatype=infer_output.datatype, tensor_contents=infer_output.contents
+        )
+        if is_shape_scalar(infer_output.shape):
+            output_value = output_value[0]
+        output_values[infer_output.name] = output_value
+    return output_values
+
+def is_shape_scalar(shape):
+    for dim in shape:
+        if (dim!=1) and (dim!=-1):
+            return False
+    return True
+
+
+def insert_value_into_tensor_content(
+    datatype: str, input_value
+) -> dataplane_pb2.InferTensorContents:
+    if datatype not in CONTENTS_FIELDS:
+        raise ValueError(f"Unknown input tensor datatype: {datatype} !")
+    return dataplane_pb2.InferTensorContents(
+        **{CONTENTS_FIELDS[datatype]: input_value}
+    )
+
+
+def extract_value_from_tensor_content(
+    datatype: str, tensor_contents: dataplane_pb2.InferTensorContents
+):
+    if datatype not in CONTENTS_FIELDS:
+        raise ValueError(f"Unknown input tensor datatype: {datatype} !")
+    return getattr(tensor_contents, CONTENTS_FIELDS[datatype])
+
+
+def resolve_shape(shape, size: int) -> List[int]:
+    """Replace the first variable (-1) dimension of ``shape`` so it holds ``size`` elements."""
+    known = 1
+    for dim in shape:
+        if dim > 0:
+            known *= dim
+    resolved = []
+    variable = size // known
+    for dim in shape:
+        if dim < 0:
+            dim, variable = variable, 1
+        resolved.append(dim)
+    return resolved or [size]
+
+
+def sample_shape(shape, sample_size: int) -> List[int]:
+    """Shape of one sample of a batched tensor holding ``sample_size`` elements."""
+    # The leading dimension of TensorMetadata.shape is the batch dimension.
+    dims = list(shape[1:])
+    if not dims:
+        return [] if sample_size == 1 else [sample_size]
+    known = 1
+    for dim in dims:
+        if dim > 0:
+            known *= dim
+    return [sample_size // known if dim < 0 else dim for dim in dims]
+
+
+def synthetic_input_values(
+    inputs_metadata: List[dataplane_pb2.ModelMetadataResponse.TensorMetadata],
+) -> Dict:
+    """Zero-valued inputs shaped from ``inputs_metadata``, variable dimensions set to 1."""
+    input_values = {}
+    for input in inputs_metadata:
+        size = int(np.prod([max(dim, 1) for dim in input.shape]))
+        if input.datatype == "BYTES":
+            input_values[input.name] = [b""] * size
+        else:
+            input_values[input.name] = np.zeros(size, RAW_DTYPES[input.datatype]).tolist()
+    return input_values
+
+
+def encode_raw_tensor(datatype: str, input_value) -> Tuple[bytes, int]:
+    if datatype == "BYTES":
+        if isinstance(input_value, bytes):
+            input_value = [input_value]
+        return (
+            b"".join(len(value).to_bytes(4, "little") + value for value in input_value),
+            len(input_value),
+        )
+    if datatype not in RAW_DTYPES:
+        raise ValueError(f"Unknown input tensor datatype: {datatype} !")
+    array = np.ascontiguousarray(input_value, dtype=RAW_DTYPES[datatype])
+    return array.tobytes(), array.size
+
+
+def decode_raw_tensor(datatype: str, shape, raw_contents: bytes):
+    if datatype == "BYTES":
+        values, offset = [], 0
+        while offset < len(raw_contents):
+            length = int.from_bytes(raw_contents[offset : offset + 4], "little")
+            values.append(raw_contents[offset + 4 : offset + 4 + length])
+            offset += 4 + length
+        return values
+    if datatype not in RAW_DTYPES:
+        raise ValueError(f"Unknown output tensor datatype: {datatype} !")
+    # frombuffer keeps a read-only view on the response bytes, no copy.
+    return np.frombuffer(raw_contents, dtype=RAW_DTYPES[datatype]).reshape(shape)
+
+
+class TensorCodec:
+    """ModelInfer request/response codec compiled once from model metadata.
+
+    Holds a prebuilt request template and, per tensor, the contents field or
+    NumPy dtype to use, so encoding a prediction only fills in the values.
+    """
+
+    def __init__(
+        self,
+        model_metadata: dataplane_pb2.ModelMetadataResponse,
+        model_name: str,
+        model_version: str = "",
+        raw_encoding: bool = False,
+    ):
+        self.raw_encoding = raw_encoding
+        for tensor in [*model_metadata.inputs, *model_metadata.outputs]:
+            if tensor.datatype not in CONTENTS_FIELDS:
+                raise ValueError(f"Unknown tensor datatype: {tensor.datatype} !")
+
+        self._template = dataplane_pb2.ModelInferRequest(
+            model_name=model_name,
+            model_version=model_version,
+            inputs=[
+                dataplane_pb2.ModelInferRequest.InferInputTensor(
+                    name=input.name,
+                    datatype=input.datatype,
+                    shape=input.shape,
+                    parameters=input.parameters,
+                )
+                for input in model_metadata.inputs
+            ],
+        )
+        self._inputs = [
+            (input.name, input.datatype, CONTENTS_FIELDS[input.datatype], list(input.shape))
+            for input in model_metadata.inputs
+        ]
+        # Scalar-ness is only known up front for fully static output shapes.
+        self._scalar_outputs = {
+            output.name: is_shape_scalar(output.shape)
+            for output in model_metadata.outputs
+            if -1 not in output.shape
+        }
+
+    @property
+    def input_names(self) -> List[str]:
+        return [name for name, *_ in self._inputs]
+
+    def encode(self, input_values: Dict) -> dataplane_pb2.ModelInferRequest:
+        request = dataplane_pb2.ModelInferRequest()
+        request.CopyFrom(self._template)
+        for tensor, (name, datatype, field, shape) in zip(request.inputs, self._inputs):
+            if self.raw_encoding:
+                raw_contents, size = encode_raw_tensor(datatype, input_values[name])
+                request.raw_input_contents.append(raw_contents)
+                tensor.shape[:] = resolve_shape(shape, size)
+            else:
+                getattr(tensor.contents, field).extend(
+                    as_contents_values(datatype, input_values[name])
+                )
+        return request
+
+    def encode_batch(self, batch_values: List[Dict]) -> dataplane_pb2.ModelInferRequest:
+        """Encode several callers' inputs stacked along a leading batch dimension."""
+        request = dataplane_pb2.ModelInferRequest()
+        request.CopyFrom(self._template)
+        for tensor, (name, datatype, field, shape) in zip(request.inputs, self._inputs):
+            if self.raw_encoding:
+                encoded = [encode_raw_tensor(datatype, values[name]) for values in batch_values]
+                sizes = [size for _, size in encoded]
+                request.raw_input_contents.append(b"".join(raw for raw, _ in encoded))
+            else:
+                samples = [as_contents_values(datatype, values[name]) for values in batch_values]
+                sizes = [len(sample) for sample in samples]
+                contents = getattr(tensor.contents, field)
+                for sample in samples:
+                    contents.extend(sample)
+            if any(size != sizes[0] for size in sizes):
+                raise ValueError(f"Input {name} has different sizes within a batch !")
+            tensor.shape[:] = [len(batch_values), *sample_shape(shape, sizes[0])]
+        return request
+
+    def decode_batch(
+        self, response: dataplane_pb2.ModelInferResponse, batch_size: int
+    ) -> List[Dict]:
+        """Split a batched response back into one output dict per caller."""
+        batch_outputs: List[Dict] = [{} for _ in range(batch_size)]
+        raw_output_contents = response.raw_output_contents
+        for i, infer_output in enumerate(response.outputs):
+            if raw_output_contents:
+                output_value = decode_raw_tensor(
+                    infer_output.datatype, [-1], raw_output_contents[i]
+                )
+            else:
+                output_value = getattr(
+                    infer_output.contents, CONTENTS_FIELDS[infer_output.datatype]
+                )
+            sample_size = len(output_value) // batch_size
+            for j, output_values in enumerate(batch_outputs):
+                sample = output_value[j * sample_size : (j + 1) * sample_size]
+                if sample_size != 1:
+                    output_values[infer_output.name] = (
+                        sample if isinstance(sample, np.ndarray) else list(sample)
+                    )
+                elif isinstance(sample, np.ndarray):
+                    output_values[infer_output.name] = sample.item()
+                else:
+                    output_values[infer_output.name] = sample[0]
+        return batch_outputs
+
+    def decode(self, response: dataplane_pb2.ModelInferResponse) -> Dict:
+        output_values = {}
+        raw_output_contents = response.raw_output_contents
+        for i, infer_output in enumerate(response.outputs):
+            if raw_output_contents:
+                output_value = decode_raw_tensor(
+                    infer_output.datatype, infer_output.shape, raw_output_contents[i]
+                )
+            else:
+                output_value = getattr(
+                    infer_output.contents, CONTENTS_FIELDS[infer_output.datatype]
+                )
+            scalar = self._scalar_outputs.get(infer_output.name)
+            if scalar is None:
+                scalar = is_shape_scalar(infer_output.shape)
+            if scalar:
+                if isinstance(output_value, np.ndarray):
+                    output_value = output_value.item()
+                else:
+                    output_value = output_value[0]
+            output_values[infer_output.name] = output_value
+        return output_values
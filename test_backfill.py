@@ -0,0 +1,126 @@
+import asyncio
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+import yaml
+from asyncua import ua
+
+from backfill import history_samples, run_backfill
+from benchmark import connect, e2e_config
+from fake_mlserver import FakeMLServer, start_fake_mlserver
+from test_session import OPCUA_PORT, start_opcua_server, stop
+
+SEED_SAMPLES = 25
+
+
+@pytest.fixture
+def config(tmp_path):
+    mlserver, mlserver_grpc_url = start_fake_mlserver(FakeMLServer())
+    config = e2e_config(SimpleNamespace(opcua_port=OPCUA_PORT, objects=1), mlserver_grpc_url)
+    config["server"]["history"] = {"seed_samples": SEED_SAMPLES, "seed_interval": 0.1}
+    with open(tmp_path / "opcua_config.yml", "w") as file:
+        yaml.safe_dump(config, file)
+    opcua_server = start_opcua_server(tmp_path)
+    yield config
+    stop(opcua_server)
+    mlserver.stop(grace=None)
+
+
+async def read_history(config, tags, start: datetime, end: datetime):
+    """Return ``{tag: {timestamp: value}}`` of the first object's tags."""
+    client = await connect(config["opcua_server_url"])
+    try:
+        idx = await client.get_namespace_index(config["opcua_namespace"])
+        history = {}
+        for tag in tags:
+            node = await client.nodes.objects.get_child(
+                [f"{idx}:Bench", f"{idx}:Machine0", f"{idx}:{tag}"]
+            )
+            data_values = await node.read_raw_history(start, end)
+            history[tag] = {dv.SourceTimestamp: dv.Value.Value for dv in data_values}
+        return history
+    finally:
+        await client.disconnect()
+
+
+async def read_inputs(config, start: datetime, end: datetime):
+    history = await read_history(config, ["weight_of_platform", "weight_of_load"], start, end)
+    return history["weight_of_platform"], history["weight_of_load"]
+
+
+def expected_sums(platform, load):
+    timestamps = platform.keys() & load.keys()
+    return {timestamp: platform[timestamp] + load[timestamp] for timestamp in timestamps}
+
+
+def time_range():
+    end = datetime.now(timezone.utc) + timedelta(minutes=1)
+    return end - timedelta(hours=1), end
+
+
+def test_backfill_writes_one_row_per_timestamp(config, tmp_path):
+    start, end = time_range()
+    platform, load = asyncio.run(read_inputs(config, start, end))
+    # Seeded inputs share their timestamps, the initial values may not.
+    seeded = expected_sums(platform, load)
+    assert len(seeded) >= SEED_SAMPLES
+
+    output = tmp_path / "scores.csv"
+    # Pages and batches far smaller than the history.
+    asyncio.run(run_backfill(config, start, end, output=str(output), chunk_size=7, batch_size=10))
+
+    with open(output, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == len(platform.keys() | load.keys())
+    sums = {datetime.fromisoformat(row["timestamp"]): json.loads(row["sum"]) for row in rows}
+    assert {timestamp: sums[timestamp] for timestamp in seeded} == seeded
+
+
+def test_backfill_writes_history_of_the_outputs(config):
+    start, end = time_range()
+    seeded = expected_sums(*asyncio.run(read_inputs(config, start, end)))
+
+    asyncio.run(run_backfill(config, start, end, write_history=True, chunk_size=7, batch_size=10))
+
+    # The server historizes the written outputs on its next publish.
+    asyncio.run(asyncio.sleep(0.5))
+    outputs = asyncio.run(read_history(config, ["total_weight"], start, end))["total_weight"]
+    assert {timestamp: outputs.get(timestamp) for timestamp in seeded} == seeded
+
+
+class PagedNode:
+    """Node stand-in cutting history pages without continuation points, like asyncua."""
+
+    def __init__(self, data_values):
+        self.data_values = data_values
+
+    async def history_read(self, details, continuation_point=None):
+        data_values = [
+            data_value
+            for data_value in self.data_values
+            if details.StartTime <= data_value.SourceTimestamp <= details.EndTime
+        ]
+        return ua.HistoryReadResult(
+            StatusCode=ua.StatusCode(),
+            HistoryData=ua.HistoryData(DataValues=data_values[: details.NumValuesPerNode]),
+        )
+
+
+def test_history_pages_keep_values_sharing_a_timestamp():
+    t = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    later = t + timedelta(seconds=1)
+    timestamps = [t, t, later, later, later]
+    node = PagedNode(
+        [ua.DataValue(ua.Variant(i), SourceTimestamp=ts) for i, ts in enumerate(timestamps)]
+    )
+
+    async def read():
+        return [
+            value
+            async for _, value in history_samples(node, t, t + timedelta(seconds=2), chunk_size=3)
+        ]
+
+    assert asyncio.run(read()) == [0, 1, 2, 3, 4]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+from fake_mlserver import FakeMLServer, start_fake_mlserver
+from inference_client import AsyncInferenceClient
+
+
+class RecordingMLServer(FakeMLServer):
+    """Fake MLServer keeping the ModelInfer requests it answered."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def ModelInfer(self, request, context):
+        self.requests.append(request)
+        return super().ModelInfer(request, context)
+
+
+@pytest.mark.parametrize("raw_encoding", [False, True], ids=["contents", "raw"])
+def test_batch_keeps_the_tensor_encoding(raw_encoding):
+    servicer = RecordingMLServer()
+    server, mlserver_grpc_url = start_fake_mlserver(servicer)
+
+    async def run():
+        inference_client = AsyncInferenceClient(
+            mlserver_grpc_url, raw_encoding_models=["pyfunc"] if raw_encoding else []
+        )
+        batcher = MicroBatcher(inference_client, window=1.0, max_batch_size=4)
+        try:
+            return await asyncio.gather(
+                *(batcher.infer("pyfunc", {"a": i, "b": 10}) for i in range(4))
+            )
+        finally:
+            await inference_client.close()
+
+    try:
+        outputs = asyncio.run(run())
+    finally:
+        server.stop(grace=None)
+    assert [output_values["sum"] for output_values in outputs] == [10, 11, 12, 13]
+    [request] = servicer.requests
+    assert list(request.inputs[0].shape) == [4]
+    assert bool(request.raw_input_contents) == raw_encoding
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+import mlserver_grpc
+from benchmark import REPO_DIR, all_predictions_done, e2e_config
+from fake_mlserver import FakeMLServer, start_fake_mlserver
+
+OPCUA_PORT = 48410
+
+
+@pytest.fixture
+def fake_mlserver():
+    server, mlserver_grpc_url = start_fake_mlserver(FakeMLServer())
+    yield mlserver_grpc_url
+    server.stop(grace=None)
+
+
+def start_opcua_server(workdir: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "server.py")],
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop(process: subprocess.Popen):
+    process.kill()
+    process.wait()
+
+
+def test_once_mode_fails_fast_when_the_server_is_down(fake_mlserver):
+    config = e2e_config(SimpleNamespace(opcua_port=OPCUA_PORT, objects=1), fake_mlserver)
+    config["trigger"] = {"mode": "once"}
+    start = time.perf_counter()
+    with pytest.raises((OSError, asyncio.TimeoutError)):
+        asyncio.run(mlserver_grpc.link_opcua_server_and_ml_model(config))
+    assert time.perf_counter() - start < 10
+
+
+def test_bridge_serves_again_after_the_server_restarts(fake_mlserver, tmp_path):
+    config = e2e_config(SimpleNamespace(opcua_port=OPCUA_PORT, objects=2), fake_mlserver)
+    config["reconnect"] = {"watchdog_interval": 0.2, "min_delay": 0.1, "max_delay": 1.0}
+    with open(tmp_path / "opcua_config.yml", "w") as file:
+        yaml.safe_dump(config, file)
+
+    async def run():
+        bridge = asyncio.ensure_future(mlserver_grpc.link_opcua_server_and_ml_model(config))
+        opcua_server = start_opcua_server(tmp_path)
+        try:
+            # server.py starts with predict set on every object.
+            await all_predictions_done(config, 2, timeout=60)
+            stop(opcua_server)
+            await asyncio.sleep(1.0)
+            opcua_server = start_opcua_server(tmp_path)
+            await all_predictions_done(config, 2, timeout=60)
+            assert not bridge.done()
+        finally:
+            bridge.cancel()
+            await asyncio.gather(bridge, return_exceptions=True)
+            stop(opcua_server)
+
+    asyncio.run(run())
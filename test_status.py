@@ -0,0 +1,56 @@
+import asyncio
+
+from asyncua import Client, Server, ua
+
+from mlserver_grpc import write_status
+from test_session import OPCUA_PORT
+
+URL = f"opc.tcp://localhost:{OPCUA_PORT}/factoryml/server/"
+
+
+class Binding:
+    mlserver_grpc_url = "localhost:8081"
+
+
+class Queue:
+    def __init__(self, depth: int):
+        self._depth = depth
+        self.dropped = {}
+
+    def depth(self, binding) -> int:
+        return self._depth
+
+
+def test_status_write_of_another_type_does_not_end_serving():
+    async def run():
+        server = Server()
+        await server.init()
+        server.set_endpoint(URL)
+        idx = await server.register_namespace("http://factoryml.alexandra.dk")
+        machine = await server.nodes.objects.add_object(idx, "Machine0")
+        # An Int32 `dropped` rejects the Int64 the bridge writes with BadTypeMismatch.
+        dropped = await machine.add_variable(idx, "dropped", 0, varianttype=ua.VariantType.Int32)
+        queue_depth = await machine.add_variable(
+            idx, "queue_depth", 0, varianttype=ua.VariantType.Int64
+        )
+        for node in (dropped, queue_depth):
+            await node.set_writable()
+
+        async with server, Client(URL) as client:
+            binding = Binding()
+            binding.status_objs = {
+                "dropped": client.get_node(dropped.nodeid),
+                "queue_depth": client.get_node(queue_depth.nodeid),
+            }
+            queue = Queue(depth=3)
+            queue.dropped[binding] = 5
+            status = asyncio.ensure_future(
+                write_status(client, {binding.mlserver_grpc_url: queue}, [binding], interval=0.05)
+            )
+            await asyncio.sleep(0.5)
+            assert not status.done()
+            status.cancel()
+            assert await queue_depth.read_value() == 3
+            assert await dropped.read_value() == 0
+
+    asyncio.run(run())
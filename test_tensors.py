@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import dataplane_pb2
+from tensors import CONTENTS_FIELDS, TensorCodec
+
+TensorMetadata = dataplane_pb2.ModelMetadataResponse.TensorMetadata
+
+# Per KServe V2 datatype, values at the edges of its range.
+VALUES = {
+    "BOOL": [True, False],
+    "UINT8": [0, 255],
+    "UINT16": [0, 65535],
+    "UINT32": [0, 2**32 - 1],
+    "UINT64": [0, 2**64 - 1],
+    "INT8": [-128, 127],
+    "INT16": [-32768, 32767],
+    "INT32": [-(2**31), 2**31 - 1],
+    "INT64": [-(2**63), 2**63 - 1],
+    "FP16": [-1.5, 65504.0],
+    "FP32": [-0.25, 2.0**127],
+    "FP64": [-1.0e-300, 1.0e300],
+    "BYTES": [b"", b"\x00bytes"],
+}
+
+
+def round_trip(datatype: str, values, shape, raw_encoding: bool):
+    """Encode ``values`` as an input of ``datatype`` and decode them back as an output."""
+    metadata = dataplane_pb2.ModelMetadataResponse(
+        inputs=[TensorMetadata(name="x", datatype=datatype, shape=[-1])],
+        outputs=[TensorMetadata(name="x", datatype=datatype, shape=[-1])],
+    )
+    codec = TensorCodec(metadata, "model", raw_encoding=raw_encoding)
+    request = codec.encode({"x": values})
+    # A model returning its input unchanged.
+    response = dataplane_pb2.ModelInferResponse(
+        outputs=[
+            dataplane_pb2.ModelInferResponse.InferOutputTensor(
+                name="x", datatype=datatype, shape=shape, contents=request.inputs[0].contents
+            )
+        ],
+        raw_output_contents=request.raw_input_contents,
+    )
+    return codec.decode(response)["x"]
+
+
+@pytest.mark.parametrize("raw_encoding", [False, True], ids=["contents", "raw"])
+@pytest.mark.parametrize("datatype", VALUES)
+def test_round_trip(datatype, raw_encoding):
+    values = VALUES[datatype]
+    decoded = round_trip(datatype, values, [len(values)], raw_encoding)
+    if datatype == "BYTES":
+        assert list(decoded) == values
+    else:
+        np.testing.assert_array_equal(np.asarray(decoded), np.asarray(values))
+
+
+@pytest.mark.parametrize("raw_encoding", [False, True], ids=["contents", "raw"])
+@pytest.mark.parametrize("datatype", VALUES)
+def test_round_trip_scalar(datatype, raw_encoding):
+    value = VALUES[datatype][-1]
+    assert round_trip(datatype, value, [1], raw_encoding) == value
+
+
+def test_unsigned_fields_match_their_width():
+    # UINT32 once went to uint64_contents and UINT64 to uint_contents.
+    assert CONTENTS_FIELDS["UINT32"] == "uint_contents"
+    assert CONTENTS_FIELDS["UINT64"] == "uint64_contents"
+    contents = dataplane_pb2.InferTensorContents()
+    with pytest.raises(ValueError):
+        getattr(contents, CONTENTS_FIELDS["UINT32"]).append(2**64 - 1)
+
+
+def test_float64_windows_encode_as_integer_contents():
+    metadata = dataplane_pb2.ModelMetadataResponse(
+        inputs=[TensorMetadata(name="x", datatype="INT64", shape=[-1])]
+    )
+    request = TensorCodec(metadata, "model").encode({"x": np.array([1.0, 2.0])})
+    assert list(request.inputs[0].contents.int64_contents) == [1, 2]
+
+
+@pytest.mark.parametrize("raw_encoding", [False, True], ids=["contents", "raw"])
+@pytest.mark.parametrize("sample", [[5], [5, 6]], ids=["scalar", "vector"])
+def test_batch_round_trip(sample, raw_encoding):
+    metadata = dataplane_pb2.ModelMetadataResponse(
+        inputs=[TensorMetadata(name="x", datatype="INT64", shape=[-1, -1])],
+        outputs=[TensorMetadata(name="x", datatype="INT64", shape=[-1, -1])],
+    )
+    codec = TensorCodec(metadata, "model", raw_encoding=raw_encoding)
+    batch = [{"x": [value + i for value in sample]} for i in range(3)]
+    request = codec.encode_batch(batch)
+    assert list(request.inputs[0].shape) == [3, len(sample)]
+    response = dataplane_pb2.ModelInferResponse(
+        outputs=[
+            dataplane_pb2.ModelInferResponse.InferOutputTensor(
+                name="x",
+                datatype="INT64",
+                shape=[3, len(sample)],
+                contents=request.inputs[0].contents,
+            )
+        ],
+        raw_output_contents=request.raw_input_contents,
+    )
+    decoded = [output_values["x"] for output_values in codec.decode_batch(response, 3)]
+    expected = [values["x"][0] if len(sample) == 1 else values["x"] for values in batch]
+    assert [np.asarray(value).tolist() for value in decoded] == expected
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class RingBuffer:
+    """The last ``size`` samples of a tag in a preallocated NumPy array.
+
+    The array has room for ``2 * size`` samples and new samples are written
+    after the previous ones; once it is full the newest ``size`` samples are
+    moved to the front. Appends are amortized O(1) without allocations and
+    the window is always one contiguous slice. Until ``size`` samples have
+    arrived the window is padded with the first sample.
+    """
+
+    def __init__(self, size: int, dtype=np.float64):
+        self.size = size
+        self.count = 0
+        self._buffer = np.zeros(2 * size, dtype=dtype)
+        self._end = size
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def extend(self, samples):
+        """Append one sample, or a block of samples from an array tag."""
+        if not hasattr(samples, "__len__"):
+            if self.count == 0:
+                self._buffer[: self.size] = samples
+            if self._end == len(self._buffer):
+                self._compact()
+            self._buffer[self._end] = samples
+            self._end += 1
+            self.count = min(self.size, self.count + 1)
+            return
+
+        samples = np.asarray(samples, dtype=self._buffer.dtype).reshape(-1)
+        if samples.size == 0:
+            return
+        if self.count == 0:
+            self._buffer[: self.size] = samples[0]
+        if samples.size >= self.size:
+            self._buffer[: self.size] = samples[-self.size :]
+            self._end = self.size
+        else:
+            if self._end + samples.size > len(self._buffer):
+                self._compact()
+            self._buffer[self._end : self._end + samples.size] = samples
+            self._end += samples.size
+        self.count = min(self.size, self.count + samples.size)
+
+    def window(self) -> np.ndarray:
+        """View on the last ``size`` samples, oldest first. Valid until the next extend."""
+        return self._buffer[self._end - self.size : self._end]
+
+    def _compact(self):
+        self._buffer[: self.size] = self._buffer[self._end - self.size : self._end]
+        self._end = self.size
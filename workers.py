@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+
+from mlserver_grpc import link_opcua_server_and_ml_model, load_config
+
+MAX_RESTART_DELAY = 30.0
+
+
+def shard_configs(config: Dict, workers: int) -> List[Dict]:
+    """Split the model bindings round-robin into one config per worker."""
+    models = config.get("models", [{}])
+    count = max(1, min(workers, len(models)))
+    shards = []
+    for index in range(count):
+        shard = dict(config, models=models[index::count])
+        if config.get("nodeid_cache_file"):
+            # Workers must not rewrite each other's NodeId cache.
+            root, ext = os.path.splitext(config["nodeid_cache_file"])
+            shard["nodeid_cache_file"] = f"{root}.{index}{ext}"
+        if (config.get("metrics") or {}).get("port"):
+            # Each worker serves its own /metrics on consecutive ports.
+            shard["metrics"] = dict(config["metrics"], port=config["metrics"]["port"] + index)
+        shards.append(shard)
+    return shards
+
+
+def run_worker(config: Dict, index: int):
+    # Each worker owns its OPC UA session and gRPC channels, none are
+    # inherited from the parent (workers are spawned, not forked).
+    logging.basicConfig(
+        level=logging.INFO, format=f"[worker {index}] %(levelname)s:%(name)s:%(message)s"
+    )
+    asyncio.run(link_opcua_server_and_ml_model(config))
+
+
+class WorkerPool:
+    """Runs config shards in worker processes and restarts crashed ones.
+
+    Workers that exit cleanly (one-shot bindings) are not restarted; failed
+    workers are restarted with an exponential backoff.
+    """
+
+    def __init__(self, shards: List[Dict]):
+        self.shards = shards
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * len(shards)
+        self.restarts = [0] * len(shards)
+        self.restart_at: Dict[int, float] = {}
+
+    def start(self, index: int):
+        process = self.context.Process(
+            target=run_worker,
+            args=(self.shards[index], index),
+            name=f"bridge-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+        logging.info(f"Started worker {index} (pid {process.pid})")
+
+    def check(self) -> bool:
+        """Restart failed workers, return False once every worker is done."""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process is None:
+                if index in self.restart_at and self.restart_at[index] <= now:
+                    del self.restart_at[index]
+                    self.start(index)
+                continue
+            if process.is_alive():
+                continue
+            self.processes[index] = None
+            if process.exitcode == 0:
+                logging.info(f"Worker {index} finished")
+                continue
+            delay = min(MAX_RESTART_DELAY, 2 ** self.restarts[index])
+            self.restarts[index] += 1
+            logging.warning(
+                f"Worker {index} exited with code {process.exitcode}, "
+                f"restarting in {delay:.0f}s"
+            )
+            self.restart_at[index] = now + delay
+        return any(self.processes) or bool(self.restart_at)
+
+    def stop(self):
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join()
+
+
+def run_workers(config: Dict):
+    shards = shard_configs(config, config.get("workers", os.cpu_count() or 1))
+    logging.info(f"Sharding model bindings across {len(shards)} workers")
+    pool = WorkerPool(shards)
+    try:
+        for index in range(len(shards)):
+            pool.start(index)
+        while pool.check():
+            time.sleep(1)
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Turn SIGTERM into SystemExit so the workers are stopped on the way out.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    config = load_config()
+    run_workers(config)